@@ -1,5 +1,6 @@
 # Copyright (C) 2018 ForgeFlow S.L. (https://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+from collections import defaultdict
 from datetime import datetime
 
 from odoo import SUPERUSER_ID, _, api, fields, models
@@ -19,11 +20,28 @@ class BlanketOrder(models.Model):
 
     @api.depends("line_ids.price_total")
     def _compute_amount_all(self):
+        # The amounts of saved orders are summed by the database, only the
+        # orders edited in a form have their lines summed in Python
+        saved_orders = self.filtered("id")
+        amounts = {}
+        if saved_orders:
+            for group in self.env["purchase.blanket.order.line"].read_group(
+                [("order_id", "in", saved_orders.ids)],
+                ["price_subtotal:sum", "price_tax:sum"],
+                ["order_id"],
+            ):
+                amounts[group["order_id"][0]] = (
+                    group["price_subtotal"],
+                    group["price_tax"],
+                )
         for order in self:
-            amount_untaxed = amount_tax = 0.0
-            for line in order.line_ids:
-                amount_untaxed += line.price_subtotal
-                amount_tax += line.price_tax
+            if order.id:
+                amount_untaxed, amount_tax = amounts.get(order.id, (0.0, 0.0))
+            else:
+                amount_untaxed = amount_tax = 0.0
+                for line in order.line_ids:
+                    amount_untaxed += line.price_subtotal
+                    amount_tax += line.price_tax
             order.update(
                 {
                     "amount_untaxed": order.currency_id.round(amount_untaxed),
@@ -334,48 +352,23 @@ class BlanketOrder(models.Model):
 
     @api.model
     def _search_original_uom_qty(self, operator, value):
-        bo_line_obj = self.env["purchase.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("original_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return [("line_ids.original_uom_qty", operator, value)]
 
     @api.model
     def _search_ordered_uom_qty(self, operator, value):
-        bo_line_obj = self.env["purchase.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("ordered_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return [("line_ids.ordered_uom_qty", operator, value)]
 
     @api.model
     def _search_invoiced_uom_qty(self, operator, value):
-        bo_line_obj = self.env["purchase.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("invoiced_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return [("line_ids.invoiced_uom_qty", operator, value)]
 
     @api.model
     def _search_received_uom_qty(self, operator, value):
-        bo_line_obj = self.env["purchase.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("received_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return [("line_ids.received_uom_qty", operator, value)]
 
     @api.model
     def _search_remaining_uom_qty(self, operator, value):
-        bo_line_obj = self.env["purchase.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("remaining_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return [("line_ids.remaining_uom_qty", operator, value)]
 
 
 class BlanketOrderLine(models.Model):
@@ -385,23 +378,41 @@ class BlanketOrderLine(models.Model):
 
     @api.depends("original_uom_qty", "price_unit", "taxes_id")
     def _compute_amount(self):
+        lines_by_taxes = defaultdict(list)
         for line in self:
-            taxes = line.taxes_id.compute_all(
-                line.price_unit,
-                line.order_id.currency_id,
-                line.original_uom_qty,
-                product=line.product_id,
-                partner=line.order_id.partner_id,
-            )
-            line.update(
-                {
-                    "price_tax": sum(
-                        t.get("amount", 0.0) for t in taxes.get("taxes", [])
-                    ),
-                    "price_total": taxes["total_included"],
-                    "price_subtotal": taxes["total_excluded"],
-                }
+            taxes = line.taxes_id
+            currency = line.order_id.currency_id
+            price_include = any(taxes.mapped("price_include"))
+            lines_by_taxes[(taxes, currency, price_include)].append(line)
+        for (taxes, currency, _price_include), lines in lines_by_taxes.items():
+            # Taxes computed by python code may depend on the product and the
+            # vendor, the other ones only on the price and the quantity
+            use_product = "code" in taxes.flatten_taxes_hierarchy().mapped(
+                "amount_type"
             )
+            amounts_by_key = {}
+            for line in lines:
+                key = (line.price_unit, line.original_uom_qty)
+                if use_product:
+                    key += (line.product_id, line.order_id.partner_id)
+                if key not in amounts_by_key:
+                    amounts_by_key[key] = taxes.compute_all(
+                        line.price_unit,
+                        currency,
+                        line.original_uom_qty,
+                        product=line.product_id,
+                        partner=line.order_id.partner_id,
+                    )
+                amounts = amounts_by_key[key]
+                line.update(
+                    {
+                        "price_tax": sum(
+                            t.get("amount", 0.0) for t in amounts.get("taxes", [])
+                        ),
+                        "price_total": amounts["total_included"],
+                        "price_subtotal": amounts["total_excluded"],
+                    }
+                )
 
     name = fields.Char(string="Description", tracking=True)
     sequence = fields.Integer()
@@ -579,34 +590,75 @@ class BlanketOrderLine(models.Model):
             else:
                 self.taxes_id = fpos.map_tax(self.product_id.supplier_taxes_id)
 
+    def _get_purchase_lines_quantities(self):
+        """Aggregate in a single query the quantities of the non cancelled
+        purchase lines of the blanket lines, grouped by purchase line product
+        and unit of measure, so the conversion is done once per group.
+
+        :return: dictionary {blanket line id: [(product_id, uom_id,
+        product_qty, qty_invoiced, qty_received), ...]}
+        """
+        res = defaultdict(list)
+        ids = [line_id for line_id in self._origin.ids if line_id]
+        if not ids:
+            return res
+        self.env["purchase.order.line"].flush_model(
+            [
+                "blanket_order_line",
+                "order_id",
+                "product_id",
+                "product_uom",
+                "product_qty",
+                "qty_invoiced",
+                "qty_received",
+            ]
+        )
+        self.env["purchase.order"].flush_model(["state"])
+        self.env.cr.execute(
+            """
+            SELECT pol.blanket_order_line, pol.product_id, pol.product_uom,
+                SUM(pol.product_qty), SUM(pol.qty_invoiced),
+                SUM(pol.qty_received)
+            FROM purchase_order_line pol
+            JOIN purchase_order po ON po.id = pol.order_id
+            WHERE pol.blanket_order_line IN %s
+                AND po.state != 'cancel'
+            GROUP BY pol.blanket_order_line, pol.product_id, pol.product_uom
+            """,
+            (tuple(ids),),
+        )
+        for line_id, *quantities in self.env.cr.fetchall():
+            res[line_id].append(quantities)
+        return res
+
     @api.depends(
         "purchase_lines.order_id.state",
         "purchase_lines.blanket_order_line",
         "purchase_lines.product_qty",
         "purchase_lines.product_uom",
+        "purchase_lines.product_id",
         "purchase_lines.qty_received",
         "purchase_lines.qty_invoiced",
         "original_uom_qty",
         "product_uom",
     )
     def _compute_quantities(self):
+        quantities = self._get_purchase_lines_quantities()
+        uom_obj = self.env["uom.uom"]
         for line in self:
-            purchase_lines = line.purchase_lines
-            line.ordered_uom_qty = sum(
-                pol.product_uom._compute_quantity(pol.product_qty, line.product_uom)
-                for pol in purchase_lines
-                if pol.order_id.state != "cancel" and pol.product_id == line.product_id
-            )
-            line.invoiced_uom_qty = sum(
-                pol.product_uom._compute_quantity(pol.qty_invoiced, line.product_uom)
-                for pol in purchase_lines
-                if pol.order_id.state != "cancel" and pol.product_id == line.product_id
-            )
-            line.received_uom_qty = sum(
-                pol.product_uom._compute_quantity(pol.qty_received, line.product_uom)
-                for pol in purchase_lines
-                if pol.order_id.state != "cancel" and pol.product_id == line.product_id
-            )
+            ordered_qty = invoiced_qty = received_qty = 0.0
+            for product_id, uom_id, product_qty, qty_invoiced, qty_received in (
+                quantities[line._origin.id]
+            ):
+                if product_id != line.product_id.id:
+                    continue
+                uom = uom_obj.browse(uom_id)
+                ordered_qty += uom._compute_quantity(product_qty, line.product_uom)
+                invoiced_qty += uom._compute_quantity(qty_invoiced, line.product_uom)
+                received_qty += uom._compute_quantity(qty_received, line.product_uom)
+            line.ordered_uom_qty = ordered_qty
+            line.invoiced_uom_qty = invoiced_qty
+            line.received_uom_qty = received_qty
             line.remaining_uom_qty = line.original_uom_qty - line.ordered_uom_qty
             line.remaining_qty = line.product_uom._compute_quantity(
                 line.remaining_uom_qty, line.product_id.uom_id
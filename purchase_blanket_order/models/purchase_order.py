@@ -1,5 +1,6 @@
 # Copyright (C) 2018 ForgeFlow S.L. (https://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+from collections import defaultdict
 from datetime import date, timedelta
 
 from odoo import _, api, fields, models
@@ -74,9 +75,9 @@ class PurchaseOrderLine(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         lines = super().create(vals_list)
-        for line in lines:
-            if not line.blanket_order_line:
-                line.with_context(assigned_from_creation=True).get_assigned_bo_line()
+        lines.filtered(lambda x: not x.blanket_order_line).with_context(
+            assigned_from_creation=True
+        )._assign_bo_lines()
         return lines
 
     def _get_assigned_bo_line(self, bo_lines):
@@ -107,16 +108,51 @@ class PurchaseOrderLine(models.Model):
             filters.append(("partner_id", "=", self.order_id.partner_id.id))
         return filters
 
-    def _get_eligible_bo_lines(self):
+    def _get_eligible_bo_lines_index(self):
+        """Open blanket order lines of the products of all the lines, loaded
+        with a single search and indexed by product. They're the candidates
+        `_get_eligible_bo_lines` filters for each line.
+
+        :return: dictionary {product_id: purchase.blanket.order.line}
+        """
+        bo_lines = self.env["purchase.blanket.order.line"].search(
+            [
+                ("product_id", "in", self.product_id.ids),
+                ("order_id.state", "=", "open"),
+            ]
+        )
+        index = defaultdict(lambda: self.env["purchase.blanket.order.line"])
+        for bo_line in bo_lines:
+            index[bo_line.product_id.id] |= bo_line
+        return index
+
+    def _get_eligible_bo_lines(self, index=None):
+        """Blanket order lines this line can be assigned to.
+
+        :param index: optional dictionary as returned by
+        `_get_eligible_bo_lines_index`. The eligibility domain is then
+        evaluated in memory over the indexed candidates instead of searched.
+        """
         base_qty = self.product_uom._compute_quantity(
             self.product_qty, self.product_id.uom_id
         )
         filters = self._get_eligible_bo_lines_domain(base_qty)
-        return self.env["purchase.blanket.order.line"].search(filters)
+        if index is None:
+            return self.env["purchase.blanket.order.line"].search(filters)
+        return index[self.product_id.id].filtered_domain(filters)
+
+    def _assign_bo_lines(self):
+        """Assign the blanket order lines of a whole set of lines, searching
+        the candidates just once for all of them."""
+        if not self:
+            return
+        index = self._get_eligible_bo_lines_index()
+        for line in self:
+            line.get_assigned_bo_line(index=index)
 
-    def get_assigned_bo_line(self):
+    def get_assigned_bo_line(self, index=None):
         self.ensure_one()
-        eligible_bo_lines = self._get_eligible_bo_lines()
+        eligible_bo_lines = self._get_eligible_bo_lines(index=index)
         if eligible_bo_lines:
             if (
                 not self.blanket_order_line
@@ -133,7 +169,9 @@ class PurchaseOrderLine(models.Model):
         res = super().onchange_product_id()
         # If product has changed remove the relation with blanket order line
         if self.product_id:
-            return self.get_assigned_bo_line()
+            return self.get_assigned_bo_line(
+                index=self._get_eligible_bo_lines_index()
+            )
         return res
 
     @api.depends("product_qty", "product_uom")
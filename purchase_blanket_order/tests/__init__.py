@@ -2,3 +2,4 @@
 
 from . import test_purchase_blanket_order
 from . import test_purchase_order
+from . import test_purchase_blanket_order_benchmark
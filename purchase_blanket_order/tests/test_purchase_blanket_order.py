@@ -95,6 +95,14 @@ class TestPurchaseBlanketOrders(common.TransactionCase):
         self.assertEqual(blanket_order.original_uom_qty, 20.0)
         self.assertEqual(blanket_order.ordered_uom_qty, 0.0)
         self.assertEqual(blanket_order.remaining_uom_qty, 20.0)
+        self.assertEqual(
+            blanket_order.amount_untaxed, blanket_order.line_ids[0].price_subtotal
+        )
+        self.assertEqual(
+            blanket_order.amount_total,
+            blanket_order.line_ids[0].price_subtotal
+            + blanket_order.line_ids[0].price_tax,
+        )
 
         # date in the past
         with self.assertRaises(UserError):
@@ -239,6 +247,25 @@ class TestPurchaseBlanketOrders(common.TransactionCase):
         self.assertEqual(bo_lines[0].remaining_uom_qty, 10.0)
         self.assertEqual(bo_lines[1].remaining_uom_qty, 30.0)
 
+        # Quantities ordered in another unit of measure are converted
+        dozen = self.env.ref("uom.product_uom_dozen")
+        po_line = bo_lines[0].purchase_lines
+        po_line.write({"product_uom": dozen.id, "product_qty": 0.5})
+        self.assertEqual(bo_lines[0].ordered_uom_qty, 6.0)
+        self.assertEqual(bo_lines[0].remaining_uom_qty, 14.0)
+        # Orders can be searched by their lines stored quantities
+        domain = [("id", "=", blanket_order.id)]
+        self.assertEqual(
+            self.blanket_order_obj.search(domain + [("remaining_uom_qty", "=", 14.0)]),
+            blanket_order,
+        )
+        self.assertFalse(
+            self.blanket_order_obj.search(domain + [("ordered_uom_qty", ">", 20.0)])
+        )
+        # Cancelled purchases don't count
+        po_line.order_id.button_cancel()
+        self.assertEqual(bo_lines[0].remaining_uom_qty, 20.0)
+
     def test_04_constraints_blanket_order(self):
         """We create a blanket order and check constraints"""
         blanket_order = self.blanket_order_obj.create(
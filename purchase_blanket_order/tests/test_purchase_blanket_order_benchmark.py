@@ -0,0 +1,72 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+import logging
+import time
+
+from odoo.tests import common, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "purchase_blanket_order_benchmark")
+class TestPurchaseBlanketOrderBenchmark(common.TransactionCase):
+    """Stress test of the blanket order amounts, not run by default.
+
+    Run it with ``--test-tags purchase_blanket_order_benchmark`` to track the
+    time taken to create agreements and edit one of their lines.
+    """
+
+    line_counts = (1000, 10000, 50000)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env["res.partner"].create(
+            {"name": "TEST SUPPLIER", "supplier_rank": 1}
+        )
+        cls.tax = cls.env["account.tax"].create(
+            {"name": "Benchmark tax", "amount": 10.0, "type_tax_use": "purchase"}
+        )
+        cls.products = cls.env["product.product"].create(
+            [{"name": "Benchmark %s" % i, "type": "consu"} for i in range(10)]
+        )
+
+    def _create_blanket_order(self, line_count):
+        blanket_order = self.env["purchase.blanket.order"].create(
+            {"partner_id": self.partner.id}
+        )
+        vals_list = []
+        for i in range(line_count):
+            product = self.products[i % len(self.products)]
+            vals_list.append(
+                {
+                    "order_id": blanket_order.id,
+                    "product_id": product.id,
+                    "product_uom": product.uom_id.id,
+                    "original_uom_qty": 1.0 + i % 5,
+                    "price_unit": 10.0,
+                    "taxes_id": [(6, 0, self.tax.ids)],
+                }
+            )
+        self.env["purchase.blanket.order.line"].create(vals_list)
+        return blanket_order
+
+    def test_blanket_order_amounts(self):
+        for line_count in self.line_counts:
+            start = time.perf_counter()
+            blanket_order = self._create_blanket_order(line_count)
+            self.env.flush_all()
+            create_time = time.perf_counter() - start
+            start = time.perf_counter()
+            blanket_order.line_ids[0].price_unit = 20.0
+            self.env.flush_all()
+            edit_time = time.perf_counter() - start
+            _logger.info(
+                "Blanket order of %d lines: created in %.3fs, line edited in %.3fs",
+                line_count,
+                create_time,
+                edit_time,
+            )
+            self.assertAlmostEqual(
+                blanket_order.amount_untaxed,
+                sum(blanket_order.line_ids.mapped("price_subtotal")),
+            )
@@ -215,3 +215,35 @@ class TestPurchaseOrder(common.TransactionCase):
         # change partner of the PO line
         with self.assertRaises(ValidationError):
             po.write({"partner_id": self.partner_2})
+
+    def test_03_create_purchase_order_lines_batch(self):
+        blanket_order = self.create_blanket_order_02()
+        blanket_order.sudo().action_confirm()
+        bo_lines = blanket_order.line_ids
+        po = self.purchase_order_obj.create(
+            {
+                "partner_id": self.partner.id,
+                "order_line": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": product.name,
+                            "product_id": product.id,
+                            "product_qty": 5.0,
+                            "product_uom": product.uom_po_id.id,
+                            "date_planned": date.today(),
+                            "price_unit": 10.0,
+                        },
+                    )
+                    for product in (self.product, self.product_2, self.product)
+                ],
+            }
+        )
+        self.assertEqual(po.order_line.blanket_order_line, bo_lines)
+        index = po.order_line._get_eligible_bo_lines_index()
+        for po_line in po.order_line:
+            self.assertEqual(
+                po_line._get_eligible_bo_lines(index=index),
+                po_line._get_eligible_bo_lines(),
+            )
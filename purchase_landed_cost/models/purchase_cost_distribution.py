@@ -4,6 +4,7 @@
 # Copyright 2024 Tecnativa - Carolina Fernandez
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3
 
+from collections import defaultdict
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
@@ -22,40 +23,31 @@ class PurchaseCostDistribution(models.Model):
                 distribution.total_purchase + distribution.total_expense
             )
 
-    @api.depends("cost_lines", "cost_lines.total_amount")
-    def _compute_total_purchase(self):
-        for distribution in self:
-            distribution.total_purchase = sum(
-                [x.total_amount for x in distribution.cost_lines]
-            )
-
-    @api.depends("cost_lines", "cost_lines.product_price_unit")
-    def _compute_total_price_unit(self):
-        for distribution in self:
-            distribution.total_price_unit = sum(
-                [x.product_price_unit for x in distribution.cost_lines]
-            )
-
-    @api.depends("cost_lines", "cost_lines.product_qty")
-    def _compute_total_uom_qty(self):
-        for distribution in self:
-            distribution.total_uom_qty = sum(
-                [x.product_qty for x in distribution.cost_lines]
-            )
-
-    @api.depends("cost_lines", "cost_lines.total_weight")
-    def _compute_total_weight(self):
-        for distribution in self:
-            distribution.total_weight = sum(
-                [x.total_weight for x in distribution.cost_lines]
-            )
-
-    @api.depends("cost_lines", "cost_lines.total_volume")
-    def _compute_total_volume(self):
+    @api.depends(
+        "cost_lines",
+        "cost_lines.total_amount",
+        "cost_lines.product_price_unit",
+        "cost_lines.product_qty",
+        "cost_lines.total_weight",
+        "cost_lines.total_volume",
+    )
+    def _compute_cost_lines_totals(self):
+        """Aggregate all the cost lines totals in a single pass"""
         for distribution in self:
-            distribution.total_volume = sum(
-                [x.total_volume for x in distribution.cost_lines]
+            totals = dict.fromkeys(
+                ["amount", "price_unit", "qty", "weight", "volume"], 0.0
             )
+            for line in distribution.cost_lines:
+                totals["amount"] += line.total_amount
+                totals["price_unit"] += line.product_price_unit
+                totals["qty"] += line.product_qty
+                totals["weight"] += line.total_weight
+                totals["volume"] += line.total_volume
+            distribution.total_purchase = totals["amount"]
+            distribution.total_price_unit = totals["price_unit"]
+            distribution.total_uom_qty = totals["qty"]
+            distribution.total_weight = totals["weight"]
+            distribution.total_volume = totals["volume"]
 
     @api.depends("expense_lines", "expense_lines.expense_amount")
     def _compute_total_expense(self):
@@ -96,37 +88,46 @@ class PurchaseCostDistribution(models.Model):
         default=fields.Date.context_today,
     )
     total_uom_qty = fields.Float(
-        compute=_compute_total_uom_qty,
+        compute="_compute_cost_lines_totals",
+        store=True,
         readonly=True,
         digits="Product UoS",
         string="Total quantity",
     )
     total_weight = fields.Float(
-        compute=_compute_total_weight,
+        compute="_compute_cost_lines_totals",
+        store=True,
         string="Total gross weight",
         readonly=True,
         digits="Stock Weight",
     )
     total_volume = fields.Float(
-        compute=_compute_total_volume, string="Total volume", readonly=True
+        compute="_compute_cost_lines_totals",
+        store=True,
+        string="Total volume",
+        readonly=True,
     )
     total_purchase = fields.Float(
-        compute=_compute_total_purchase,
+        compute="_compute_cost_lines_totals",
+        store=True,
         digits="Account",
         string="Total purchase",
     )
     total_price_unit = fields.Float(
-        compute=_compute_total_price_unit,
+        compute="_compute_cost_lines_totals",
+        store=True,
         string="Total price unit",
         digits="Product Price",
     )
     amount_total = fields.Float(
         compute=_compute_amount_total,
+        store=True,
         digits="Account",
         string="Total",
     )
     total_expense = fields.Float(
         compute=_compute_total_expense,
+        store=True,
         digits="Account",
         string="Total expenses",
     )
@@ -176,45 +177,58 @@ class PurchaseCostDistribution(models.Model):
         return super(PurchaseCostDistribution, self).write(vals)
 
     @api.model
-    def _prepare_expense_line(self, expense_line, cost_line):
-        distribution = cost_line.distribution
-        if expense_line.type.calculation_method == "amount":
-            multiplier = cost_line.total_amount
-            if expense_line.affected_lines:
-                divisor = sum([x.total_amount for x in expense_line.affected_lines])
-            else:
-                divisor = distribution.total_purchase
-        elif expense_line.type.calculation_method == "price":
-            multiplier = cost_line.product_price_unit
-            if expense_line.affected_lines:
-                divisor = sum(
-                    [x.product_price_unit for x in expense_line.affected_lines]
-                )
-            else:
-                divisor = distribution.total_price_unit
-        elif expense_line.type.calculation_method == "qty":
-            multiplier = cost_line.product_qty
-            if expense_line.affected_lines:
-                divisor = sum([x.product_qty for x in expense_line.affected_lines])
-            else:
-                divisor = distribution.total_uom_qty
-        elif expense_line.type.calculation_method == "weight":
-            multiplier = cost_line.total_weight
-            if expense_line.affected_lines:
-                divisor = sum([x.total_weight for x in expense_line.affected_lines])
-            else:
-                divisor = distribution.total_weight
-        elif expense_line.type.calculation_method == "volume":
-            multiplier = cost_line.total_volume
-            if expense_line.affected_lines:
-                divisor = sum([x.total_volume for x in expense_line.affected_lines])
-            else:
-                divisor = distribution.total_volume
-        elif expense_line.type.calculation_method == "equal":
-            multiplier = 1
-            divisor = len(expense_line.affected_lines) or len(distribution.cost_lines)
-        else:
+    def _get_calculation_method_field(self, calculation_method):
+        """Cost line field the expenses are distributed by for each
+        calculation method, or False if all the lines weight the same."""
+        return {
+            "amount": "total_amount",
+            "price": "product_price_unit",
+            "qty": "product_qty",
+            "weight": "total_weight",
+            "volume": "total_volume",
+            "equal": False,
+        }.get(calculation_method)
+
+    @api.model
+    def _get_expense_divisor(self, expense_line):
+        """Total the expense amount is distributed across, computed once per
+        expense line."""
+        field_name = self._get_calculation_method_field(
+            expense_line.type.calculation_method
+        )
+        if field_name is None:
             raise UserError(_("No valid distribution type."))
+        distribution = expense_line.distribution
+        if not field_name:
+            return len(expense_line.affected_lines) or len(distribution.cost_lines)
+        if expense_line.affected_lines:
+            return sum(expense_line.affected_lines.mapped(field_name))
+        # Stored totals of the whole distribution
+        return distribution[self._get_total_field(field_name)]
+
+    @api.model
+    def _get_total_field(self, line_field_name):
+        """Distribution total field of each cost line field"""
+        return {
+            "total_amount": "total_purchase",
+            "product_price_unit": "total_price_unit",
+            "product_qty": "total_uom_qty",
+            "total_weight": "total_weight",
+            "total_volume": "total_volume",
+        }[line_field_name]
+
+    @api.model
+    def _prepare_expense_line(self, expense_line, cost_line, divisor=None):
+        """Values of the cost line share of the given expense line.
+
+        :param divisor: optional precomputed result of `_get_expense_divisor`
+        """
+        if divisor is None:
+            divisor = self._get_expense_divisor(expense_line)
+        field_name = self._get_calculation_method_field(
+            expense_line.type.calculation_method
+        )
+        multiplier = cost_line[field_name] if field_name else 1
         if divisor:
             expense_amount = expense_line.expense_amount * multiplier / divisor
         else:
@@ -239,19 +253,98 @@ class PurchaseCostDistribution(models.Model):
             # Check if exist lines in distribution
             if not distribution.cost_lines:
                 raise UserError(_("There is no picking lines in the distribution"))
-            # Calculating expense line
+        # Calculating expense lines for all the distributions at once
+        self.mapped("cost_lines.expense_lines").unlink()
+        vals_list = []
+        for distribution in self:
+            expenses = [
+                (
+                    expense,
+                    set(expense.affected_lines.ids),
+                    self._get_expense_divisor(expense),
+                )
+                for expense in distribution.expense_lines
+            ]
             for cost_line in distribution.cost_lines:
-                cost_line.expense_lines.unlink()
-                expense_lines = []
-                for expense in distribution.expense_lines:
-                    if (
-                        expense.affected_lines
-                        and cost_line not in expense.affected_lines
-                    ):
+                for expense, affected_ids, divisor in expenses:
+                    if affected_ids and cost_line.id not in affected_ids:
                         continue
-                    expense_lines.append(self._prepare_expense_line(expense, cost_line))
-                cost_line.expense_lines = [(0, 0, x) for x in expense_lines]
-            distribution.state = "calculated"
+                    vals = self._prepare_expense_line(
+                        expense, cost_line, divisor=divisor
+                    )
+                    vals["distribution_line"] = cost_line.id
+                    vals_list.append(vals)
+        self.env["purchase.cost.distribution.line.expense"].create(vals_list)
+        self.write({"state": "calculated"})
+        return True
+
+    def _recompute_totals_sql(self):
+        """Repair the stored totals of the distributions, or all of them if
+        called on an empty recordset, with one aggregated query."""
+        self.flush_model()
+        self.env["purchase.cost.distribution.line"].flush_model()
+        self.env["purchase.cost.distribution.expense"].flush_model()
+        self.env["stock.move"].flush_model(["price_unit"])
+        where_clause = ""
+        params = {}
+        if self:
+            where_clause = "WHERE pcd.id IN %(ids)s"
+            params["ids"] = tuple(self.ids)
+        self.env.cr.execute(
+            """
+            UPDATE purchase_cost_distribution d
+            SET total_purchase = agg.total_purchase,
+                total_price_unit = agg.total_price_unit,
+                total_uom_qty = agg.total_uom_qty,
+                total_weight = agg.total_weight,
+                total_volume = agg.total_volume,
+                total_expense = agg.total_expense,
+                amount_total = agg.total_purchase + agg.total_expense
+            FROM (
+                SELECT pcd.id,
+                    COALESCE(cl.total_purchase, 0.0) AS total_purchase,
+                    COALESCE(cl.total_price_unit, 0.0) AS total_price_unit,
+                    COALESCE(cl.total_uom_qty, 0.0) AS total_uom_qty,
+                    COALESCE(cl.total_weight, 0.0) AS total_weight,
+                    COALESCE(cl.total_volume, 0.0) AS total_volume,
+                    COALESCE(ex.total_expense, 0.0) AS total_expense
+                FROM purchase_cost_distribution pcd
+                LEFT JOIN (
+                    SELECT pcdl.distribution,
+                        SUM(COALESCE(sm.price_unit, 0.0) * pcdl.product_qty)
+                            AS total_purchase,
+                        SUM(COALESCE(sm.price_unit, 0.0)) AS total_price_unit,
+                        SUM(pcdl.product_qty) AS total_uom_qty,
+                        SUM(pcdl.total_weight) AS total_weight,
+                        SUM(pcdl.total_volume) AS total_volume
+                    FROM purchase_cost_distribution_line pcdl
+                    JOIN stock_move sm ON sm.id = pcdl.move_id
+                    GROUP BY pcdl.distribution
+                ) cl ON cl.distribution = pcd.id
+                LEFT JOIN (
+                    SELECT distribution, SUM(expense_amount) AS total_expense
+                    FROM purchase_cost_distribution_expense
+                    GROUP BY distribution
+                ) ex ON ex.distribution = pcd.id
+                {where_clause}
+            ) agg
+            WHERE d.id = agg.id
+            """.format(
+                where_clause=where_clause
+            ),
+            params,
+        )
+        self.invalidate_model(
+            [
+                "total_purchase",
+                "total_price_unit",
+                "total_uom_qty",
+                "total_weight",
+                "total_volume",
+                "total_expense",
+                "amount_total",
+            ]
+        )
         return True
 
     def _product_price_update(self, product, vals_list):
@@ -259,21 +352,62 @@ class PurchaseCostDistribution(models.Model):
         method behaviour, but taking into account that calculations are made
         on an already done moves, and prices sources are given as parameters.
         """
-        moves_total_qty = 0
-        moves_total_diff_price = 0
+        return self._products_price_update(vals_list)
+
+    def _products_price_update(self, vals_list, dry_run=False):
+        """Batch version of `_product_price_update` for the moves of several
+        products. The moves are grouped by product, the previous availability
+        of all of them is read with one grouped quant query and the new costs
+        are written together.
+
+        :param vals_list: list of (move, price_diff) tuples
+        :param dry_run: if set, just return the planned costs without
+        writing them
+        :return: dictionary {product: (current cost, new cost)}
+        """
+        moves_by_product = defaultdict(list)
         for move, price_diff in vals_list:
-            moves_total_qty += move.product_qty
-            moves_total_diff_price += move.product_qty * price_diff
-        prev_qty_available = product.qty_available - moves_total_qty
-        if prev_qty_available <= 0:
-            prev_qty_available = 0
-        total_available = prev_qty_available + moves_total_qty
-        new_std_price = (
-            total_available * product.standard_price + moves_total_diff_price
-        ) / total_available
-        # Write the standard price, as SUPERUSER_ID, because a
-        # warehouse manager may not have the right to write on products
-        product.sudo().write({"standard_price": new_std_price})
+            moves_by_product[move.product_id].append((move, price_diff))
+        products = self.env["product.product"].union(*moves_by_product)
+        if not products:
+            return {}
+        domain_quant_loc = products._get_domain_locations()[0]
+        qty_available = {
+            group["product_id"][0]: group["quantity"]
+            for group in self.env["stock.quant"].read_group(
+                [("product_id", "in", products.ids)] + domain_quant_loc,
+                ["product_id", "quantity"],
+                ["product_id"],
+            )
+        }
+        res = {}
+        for product, product_vals in moves_by_product.items():
+            moves_total_qty = 0
+            moves_total_diff_price = 0
+            for move, price_diff in product_vals:
+                moves_total_qty += move.product_qty
+                moves_total_diff_price += move.product_qty * price_diff
+            prev_qty_available = qty_available.get(product.id, 0) - moves_total_qty
+            if prev_qty_available <= 0:
+                prev_qty_available = 0
+            total_available = prev_qty_available + moves_total_qty
+            if not total_available:
+                continue
+            new_std_price = (
+                total_available * product.standard_price + moves_total_diff_price
+            ) / total_available
+            res[product] = (product.standard_price, new_std_price)
+        if dry_run:
+            return res
+        # Products sharing the same new cost are written at once. Write the
+        # standard price, as SUPERUSER_ID, because a warehouse manager may not
+        # have the right to write on products
+        products_by_price = defaultdict(lambda: self.env["product.product"])
+        for product, (_old_price, new_price) in res.items():
+            products_by_price[new_price] |= product
+        for new_price, price_products in products_by_price.items():
+            price_products.sudo().write({"standard_price": new_price})
+        return res
 
     def action_done(self):
         self.ensure_one()
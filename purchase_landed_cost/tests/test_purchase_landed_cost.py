@@ -202,3 +202,96 @@ class TestPurchaseLandedCost(common.TransactionCase):
         self.assertAlmostEqual(self.distribution.cost_lines[0].cost_ratio, 1)
         self.assertAlmostEqual(self.distribution.total_expense, 10.0)
         self.assertEqual(self.distribution.state, "calculated")
+
+    def test_distribution_affected_lines(self):
+        order2 = self.purchase_order.copy()
+        order2.order_line.price_unit = 2
+        order2.button_confirm()
+        picking2 = order2.picking_ids
+        self.env["stock.immediate.transfer"].create(
+            {"pick_ids": [(4, picking2.id)]}
+        ).process()
+        picking2.button_validate()
+        wiz = (
+            self.env["picking.import.wizard"]
+            .with_context(active_id=self.distribution.id)
+            .create(
+                {
+                    "supplier": self.supplier.id,
+                    "pickings": [(6, 0, (self.picking + picking2).ids)],
+                }
+            )
+        )
+        wiz.action_import_picking()
+        line_1 = self.distribution.cost_lines.filtered(
+            lambda x: x.picking_id == self.picking
+        )
+        line_2 = self.distribution.cost_lines - line_1
+        self.distribution.expense_lines = [
+            (
+                0,
+                0,
+                {
+                    "type": self.type_amount.id,
+                    "expense_amount": 50.0,
+                },
+            ),
+            (
+                0,
+                0,
+                {
+                    "type": self.type_equal.id,
+                    "expense_amount": 6.0,
+                    "affected_lines": [(6, 0, line_2.ids)],
+                },
+            ),
+        ]
+        self.distribution.action_calculate()
+        # Qty expense: 10 split by 5 + 5 units. Amount expense: 50 split by
+        # 15 + 10 of purchase. Equal expense: 6 only for the second line.
+        self.assertEqual(len(line_1.expense_lines), 2)
+        self.assertEqual(len(line_2.expense_lines), 3)
+        self.assertAlmostEqual(line_1.expense_amount, 5.0 + 30.0)
+        self.assertAlmostEqual(line_2.expense_amount, 5.0 + 20.0 + 6.0)
+        self.assertAlmostEqual(line_2.cost_ratio, 31.0 / 5)
+        # Calculating again replaces the previous distribution
+        self.distribution.action_calculate()
+        self.assertEqual(len(line_2.expense_lines), 3)
+        self.assertAlmostEqual(self.distribution.total_expense, 66.0)
+
+    def test_products_price_update(self):
+        distribution_obj = self.env["purchase.cost.distribution"]
+        self.assertAlmostEqual(self.product.standard_price, 3.0)
+        move = self.picking.move_ids
+        planned = distribution_obj._products_price_update(
+            [(move, 2.0)], dry_run=True
+        )
+        self.assertEqual(list(planned), [self.product])
+        self.assertAlmostEqual(planned[self.product][0], 3.0)
+        self.assertAlmostEqual(planned[self.product][1], 5.0)
+        self.assertAlmostEqual(self.product.standard_price, 3.0)
+        distribution_obj._products_price_update([(move, 2.0)])
+        self.assertAlmostEqual(self.product.standard_price, 5.0)
+
+    def test_distribution_totals_repair(self):
+        wiz = (
+            self.env["picking.import.wizard"]
+            .with_context(active_id=self.distribution.id)
+            .create(
+                {"supplier": self.supplier.id, "pickings": [(6, 0, self.picking.ids)]}
+            )
+        )
+        wiz.action_import_picking()
+        self.distribution.flush_recordset()
+        self.env.cr.execute(
+            """UPDATE purchase_cost_distribution
+            SET total_purchase = 0, total_uom_qty = 0, amount_total = 0
+            WHERE id = %s""",
+            (self.distribution.id,),
+        )
+        self.distribution.invalidate_recordset()
+        self.assertAlmostEqual(self.distribution.total_purchase, 0.0)
+        self.distribution._recompute_totals_sql()
+        self.assertAlmostEqual(self.distribution.total_uom_qty, 5.0)
+        self.assertAlmostEqual(self.distribution.total_purchase, 15.0)
+        self.assertAlmostEqual(self.distribution.amount_total, 25.0)
@@ -2,7 +2,7 @@
 
 {
     "name": "Purchase Product Last Price Info",
-    "version": "16.0.1.0.1",
+    "version": "16.0.1.1.0",
     "category": "Purchase Management",
     "license": "AGPL-3",
     "author": "AvanzOSC, Tecnativa, Odoo Community Association (OCA)",
@@ -10,6 +10,7 @@
     "maintainers": ["LoisRForgeFlow"],
     "website": "https://github.com/OCA/purchase-workflow",
     "depends": ["purchase"],
-    "data": ["views/product_views.xml"],
+    "data": ["security/ir.model.access.csv", "views/product_views.xml"],
+    "post_init_hook": "post_init_hook",
     "installable": True,
 }
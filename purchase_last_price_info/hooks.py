@@ -0,0 +1,13 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+
+from odoo import SUPERUSER_ID, api
+
+_logger = logging.getLogger(__name__)
+
+
+def post_init_hook(cr, registry):
+    _logger.info("Computing last purchase info of all the products")
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["purchase.last.price.info"]._refresh()
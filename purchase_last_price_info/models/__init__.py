@@ -1,2 +1,6 @@
+from . import purchase_last_price_info
 from . import product_product
 from . import product_template
+from . import purchase_order
+from . import purchase_order_line
+from . import res_currency
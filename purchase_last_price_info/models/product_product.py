@@ -48,18 +48,24 @@ class ProductProduct(models.Model):
         digits=0,
     )
 
-    @api.depends("last_purchase_line_ids")
+    @api.depends_context("allowed_company_ids")
     def _compute_last_purchase_line_id(self):
+        infos = self.env["purchase.last.price.info"]._get_last_infos(self)
+        empty_info = self.env["purchase.last.price.info"]
         for item in self:
-            item.last_purchase_line_id = fields.first(item.last_purchase_line_ids)
+            info = infos.get(item._origin.id, empty_info)
+            item.last_purchase_line_id = info.purchase_line_id
 
-    @api.depends("last_purchase_line_id")
+    @api.depends_context("allowed_company_ids")
     def _compute_last_purchase_line_id_info(self):
+        infos = self.env["purchase.last.price.info"]._get_last_infos(self)
+        empty_info = self.env["purchase.last.price.info"]
         for item in self:
-            item.last_purchase_price = item.last_purchase_line_id.price_unit
-            item.last_purchase_date = item.last_purchase_line_id.date_order
-            item.last_purchase_supplier_id = item.last_purchase_line_id.partner_id
-            item.last_purchase_currency_id = item.last_purchase_line_id.currency_id
+            info = infos.get(item._origin.id, empty_info)
+            item.last_purchase_price = info.price_unit
+            item.last_purchase_date = info.date_order
+            item.last_purchase_supplier_id = info.partner_id
+            item.last_purchase_currency_id = info.currency_id
 
     @api.depends("last_purchase_line_id", "last_purchase_currency_id")
     def _compute_show_last_purchase_price_currency(self):
@@ -78,13 +84,18 @@ class ProductProduct(models.Model):
         "last_purchase_date",
     )
     def _compute_last_purchase_price_currency(self):
-        for item in self:
-            if item.show_last_purchase_price_currency:
-                rates = item.last_purchase_currency_id._get_rates(
-                    item.last_purchase_line_id.company_id, item.last_purchase_date
-                )
-                item.last_purchase_price_currency = rates.get(
-                    item.last_purchase_currency_id.id
+        items = self.filtered("show_last_purchase_price_currency")
+        rates = self.env["res.currency"]._get_rates_multi(
+            [
+                (
+                    item.last_purchase_currency_id,
+                    item.last_purchase_line_id.company_id,
+                    item.last_purchase_date,
                 )
-            else:
-                item.last_purchase_price_currency = 1
+                for item in items
+            ]
+        )
+        for item, rate in zip(items, rates):
+            item.last_purchase_price_currency = rate
+        for item in self - items:
+            item.last_purchase_price_currency = 1
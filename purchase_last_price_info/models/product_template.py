@@ -44,15 +44,25 @@ class ProductTemplate(models.Model):
         digits=0,
     )
 
-    @api.depends("last_purchase_line_ids")
+    @api.depends_context("allowed_company_ids")
     def _compute_last_purchase_line_id(self):
+        infos = self.env["purchase.last.price.info"]._get_last_infos(
+            self.product_variant_ids, key="product_id.product_tmpl_id"
+        )
+        empty_info = self.env["purchase.last.price.info"]
         for item in self:
-            item.last_purchase_line_id = fields.first(item.last_purchase_line_ids)
+            info = infos.get(item._origin.id, empty_info)
+            item.last_purchase_line_id = info.purchase_line_id
 
-    @api.depends("last_purchase_line_id")
+    @api.depends_context("allowed_company_ids")
     def _compute_last_purchase_line_id_info(self):
+        infos = self.env["purchase.last.price.info"]._get_last_infos(
+            self.product_variant_ids, key="product_id.product_tmpl_id"
+        )
+        empty_info = self.env["purchase.last.price.info"]
         for item in self:
-            item.last_purchase_price = item.last_purchase_line_id.price_unit
-            item.last_purchase_date = item.last_purchase_line_id.date_order
-            item.last_purchase_supplier_id = item.last_purchase_line_id.partner_id
-            item.last_purchase_currency_id = item.last_purchase_line_id.currency_id
+            info = infos.get(item._origin.id, empty_info)
+            item.last_purchase_price = info.price_unit
+            item.last_purchase_date = info.date_order
+            item.last_purchase_supplier_id = info.partner_id
+            item.last_purchase_currency_id = info.currency_id
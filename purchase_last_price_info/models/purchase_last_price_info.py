@@ -0,0 +1,148 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+
+class PurchaseLastPriceInfo(models.Model):
+    """Snapshot of the last confirmed purchase line of each product and
+    company. It's refreshed for the affected products when purchase orders
+    are confirmed, cancelled or their confirmed lines change, so product
+    views don't have to go through the whole purchase history."""
+
+    _name = "purchase.last.price.info"
+    _description = "Product Last Purchase Info"
+    _order = "order_id, id"
+
+    product_id = fields.Many2one(
+        comodel_name="product.product",
+        required=True,
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    company_id = fields.Many2one(
+        comodel_name="res.company",
+        required=True,
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    purchase_line_id = fields.Many2one(
+        comodel_name="purchase.order.line",
+        string="Last Purchase Line",
+        required=True,
+        readonly=True,
+        ondelete="cascade",
+    )
+    order_id = fields.Many2one(
+        comodel_name="purchase.order",
+        readonly=True,
+    )
+    price_unit = fields.Float(readonly=True)
+    date_order = fields.Datetime(readonly=True)
+    partner_id = fields.Many2one(
+        comodel_name="res.partner",
+        string="Last Supplier",
+        readonly=True,
+    )
+    currency_id = fields.Many2one(
+        comodel_name="res.currency",
+        string="Last Purchase Currency",
+        readonly=True,
+    )
+
+    _sql_constraints = [
+        (
+            "product_company_uniq",
+            "unique (product_id, company_id)",
+            "There can only be one last purchase info per product and company.",
+        ),
+    ]
+
+    @api.model
+    def _refresh(self, products=None):
+        """Recompute the snapshot of the given products from their confirmed
+        purchase lines, or the whole snapshot if no products are given.
+
+        :param products: optional product.product recordset
+        """
+        if products is not None and not products:
+            return
+        self.flush_model()
+        self.env["purchase.order.line"].flush_model(
+            ["product_id", "company_id", "state", "price_unit", "sequence"]
+        )
+        self.env["purchase.order"].flush_model(
+            ["priority", "date_order", "partner_id", "currency_id"]
+        )
+        cr = self.env.cr
+        product_filter = ""
+        params = {"uid": self.env.uid}
+        if products is not None:
+            product_filter = "AND pol.product_id IN %(product_ids)s"
+            params["product_ids"] = tuple(products.ids)
+            cr.execute(
+                """
+                DELETE FROM purchase_last_price_info
+                WHERE product_id IN %(product_ids)s
+                """,
+                params,
+            )
+        else:
+            cr.execute("DELETE FROM purchase_last_price_info")
+        cr.execute(
+            """
+            INSERT INTO purchase_last_price_info (
+                product_id, company_id, purchase_line_id, order_id,
+                price_unit, date_order, partner_id, currency_id,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT DISTINCT ON (pol.product_id, pol.company_id)
+                pol.product_id, pol.company_id, pol.id, po.id,
+                pol.price_unit, po.date_order, po.partner_id, po.currency_id,
+                %(uid)s, NOW() AT TIME ZONE 'UTC',
+                %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM purchase_order_line pol
+            JOIN purchase_order po ON po.id = pol.order_id
+            WHERE pol.state IN ('purchase', 'done')
+                AND pol.product_id IS NOT NULL
+                AND pol.company_id IS NOT NULL
+                {product_filter}
+            ORDER BY pol.product_id, pol.company_id, po.priority DESC,
+                po.id DESC, pol.sequence, pol.id
+            """.format(
+                product_filter=product_filter
+            ),
+            params,
+        )
+        self.invalidate_model()
+        fnames = [
+            "last_purchase_line_id",
+            "last_purchase_price",
+            "last_purchase_date",
+            "last_purchase_supplier_id",
+            "last_purchase_currency_id",
+        ]
+        self.env["product.product"].invalidate_model(fnames)
+        self.env["product.template"].invalidate_model(fnames)
+
+    @api.model
+    def _get_last_infos(self, products, key="product_id"):
+        """Last snapshot of each of the given products among the current
+        allowed companies, following the purchase orders order.
+
+        :param products: product.product recordset
+        :param key: field path to group the snapshots by
+        :return: dictionary {key value id: purchase.last.price.info}
+        """
+        infos = self.search(
+            [
+                ("product_id", "in", products.ids),
+                ("company_id", "in", self.env.companies.ids),
+            ]
+        )
+        res = {}
+        # Infos are sorted by purchase order, so the first one is kept
+        for info in infos:
+            res.setdefault(info.mapped(key).id, info)
+        return res
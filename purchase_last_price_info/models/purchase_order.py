@@ -0,0 +1,25 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+
+class PurchaseOrder(models.Model):
+    _inherit = "purchase.order"
+
+    def write(self, vals):
+        if not {
+            "state",
+            "priority",
+            "date_order",
+            "partner_id",
+            "currency_id",
+        } & vals.keys():
+            return super().write(vals)
+        orders = self.filtered(lambda x: x.state in ("purchase", "done"))
+        res = super().write(vals)
+        orders |= self.filtered(lambda x: x.state in ("purchase", "done"))
+        if orders:
+            self.env["purchase.last.price.info"].sudo()._refresh(
+                orders.order_line.product_id
+            )
+        return res
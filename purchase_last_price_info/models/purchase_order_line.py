@@ -0,0 +1,38 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = "purchase.order.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        confirmed_lines = lines.filtered(lambda x: x.state in ("purchase", "done"))
+        if confirmed_lines:
+            self.env["purchase.last.price.info"].sudo()._refresh(
+                confirmed_lines.product_id
+            )
+        return lines
+
+    def write(self, vals):
+        if not {"product_id", "price_unit", "sequence"} & vals.keys():
+            return super().write(vals)
+        confirmed_lines = self.filtered(lambda x: x.state in ("purchase", "done"))
+        products = confirmed_lines.product_id
+        res = super().write(vals)
+        if confirmed_lines:
+            self.env["purchase.last.price.info"].sudo()._refresh(
+                products | confirmed_lines.product_id
+            )
+        return res
+
+    def unlink(self):
+        products = self.filtered(
+            lambda x: x.state in ("purchase", "done")
+        ).product_id
+        res = super().unlink()
+        if products:
+            self.env["purchase.last.price.info"].sudo()._refresh(products)
+        return res
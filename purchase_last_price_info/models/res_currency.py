@@ -0,0 +1,73 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+RATES_CACHE = "purchase_last_price_info.currency_rates"
+
+
+class ResCurrency(models.Model):
+    _inherit = "res.currency"
+
+    @api.model
+    def _invalidate_rates_multi_cache(self):
+        self.env.cr.cache.pop(RATES_CACHE, None)
+
+    @api.model
+    def _get_rates_multi(self, keys):
+        """Bulk equivalent of `_get_rates` for several currencies, companies
+        and dates, resolving all the rates with a single query.
+
+        The rates are kept in cache until the end of the transaction or the
+        next change of currency rates, so only the keys not resolved yet are
+        queried.
+
+        :param keys: list of (currency, company, date) tuples
+        :return: list with the rate of each key
+        """
+        rates = self.env.cr.cache.setdefault(RATES_CACHE, {})
+        norm_keys = [
+            (currency.id, company.id, fields.Date.to_date(date))
+            for currency, company, date in keys
+        ]
+        missing_keys = {key for key in norm_keys if key not in rates}
+        if missing_keys:
+            self.env["res.currency.rate"].flush_model(
+                ["rate", "currency_id", "company_id", "name"]
+            )
+            currency_ids, company_ids, dates = zip(*missing_keys)
+            self.env.cr.execute(
+                """
+                SELECT k.currency_id, k.company_id, k.date,
+                    COALESCE((
+                        SELECT r.rate FROM res_currency_rate r
+                        WHERE r.currency_id = k.currency_id
+                            AND r.name <= k.date
+                            AND (r.company_id IS NULL OR r.company_id = k.company_id)
+                        ORDER BY r.company_id, r.name DESC
+                        LIMIT 1
+                    ), 1.0)
+                FROM unnest(%s::int[], %s::int[], %s::date[])
+                    AS k(currency_id, company_id, date)
+                """,
+                (list(currency_ids), list(company_ids), list(dates)),
+            )
+            for currency_id, company_id, date, rate in self.env.cr.fetchall():
+                rates[(currency_id, company_id, date)] = rate
+        return [rates[key] for key in norm_keys]
+
+
+class ResCurrencyRate(models.Model):
+    _inherit = "res.currency.rate"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env["res.currency"]._invalidate_rates_multi_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env["res.currency"]._invalidate_rates_multi_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env["res.currency"]._invalidate_rates_multi_cache()
+        return super().unlink()
@@ -94,3 +94,99 @@ class TestPurchaseLastPriceInfo(common.TransactionCase):
         self.assertEqual(self.partner, self.product.last_purchase_supplier_id)
         purchase_order.button_cancel()
         self.assertEqual(purchase_order.state, "cancel")
+        self.assertNotEqual(
+            self.product.last_purchase_line_id.order_id, purchase_order
+        )
+
+    def test_purchase_last_price_info_snapshot(self):
+        purchase_order = self.purchase_model.create(
+            {
+                "date_order": "2100-01-01",
+                "currency_id": self.currency.id,
+                "partner_id": self.partner.id,
+                "order_line": [
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.product.id,
+                            "product_uom": self.product.uom_id.id,
+                            "price_unit": 13.0,
+                            "name": self.product.name,
+                            "date_planned": fields.Datetime.now(),
+                            "product_qty": 1,
+                        },
+                    )
+                ],
+            }
+        )
+        info_model = self.env["purchase.last.price.info"]
+        domain = [("product_id", "=", self.product.id)]
+        purchase_order.button_confirm()
+        info = info_model.search(domain)
+        self.assertEqual(info.purchase_line_id, purchase_order.order_line)
+        self.assertEqual(self.product.last_purchase_price, 13.0)
+        self.assertEqual(self.product.product_tmpl_id.last_purchase_price, 13.0)
+        # Price changes on confirmed lines are reflected
+        purchase_order.order_line.price_unit = 14.0
+        self.assertEqual(self.product.last_purchase_price, 14.0)
+        # A full rebuild gives the same snapshot
+        info_model._refresh()
+        info = info_model.search(domain)
+        self.assertEqual(info.purchase_line_id, purchase_order.order_line)
+        self.assertEqual(info.price_unit, 14.0)
+        purchase_order.button_cancel()
+        self.assertNotEqual(
+            info_model.search(domain).purchase_line_id, purchase_order.order_line
+        )
+
+    def test_get_rates_multi(self):
+        company = self.env.ref("base.main_company")
+        self._create_currency_rate(self.currency_extra, "2010-01-01", 3.0)
+        keys = [
+            (self.currency_extra, company, "2005-06-01"),
+            (self.currency_extra, company, "2011-06-01"),
+            (self.currency, company, "2011-06-01"),
+            (self.currency_extra, company, "2005-06-01"),
+        ]
+        rates = self.env["res.currency"]._get_rates_multi(keys)
+        self.assertEqual(rates[0], 2.0)
+        self.assertEqual(rates[1], 3.0)
+        self.assertEqual(rates[3], rates[0])
+        for (currency, rate_company, date), rate in zip(keys, rates):
+            self.assertEqual(
+                currency._get_rates(rate_company, date)[currency.id], rate
+            )
+        # New rates are read instead of the cached ones
+        self._create_currency_rate(self.currency_extra, "2011-01-01", 4.0)
+        rates = self.env["res.currency"]._get_rates_multi(keys[:2])
+        self.assertEqual(rates, [2.0, 4.0])
+
+    def test_purchase_last_price_info_priority(self):
+        purchase_orders = self.purchase_model.create(
+            [
+                {
+                    "partner_id": self.partner.id,
+                    "order_line": [
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": self.product.id,
+                                "product_uom": self.product.uom_id.id,
+                                "price_unit": price_unit,
+                                "name": self.product.name,
+                                "date_planned": fields.Datetime.now(),
+                                "product_qty": 1,
+                            },
+                        )
+                    ],
+                }
+                for price_unit in (21.0, 22.0)
+            ]
+        )
+        purchase_orders.button_confirm()
+        self.assertEqual(self.product.last_purchase_price, 22.0)
+        # Urgent orders come first in the snapshot
+        purchase_orders[0].priority = "1"
+        self.assertEqual(self.product.last_purchase_price, 21.0)
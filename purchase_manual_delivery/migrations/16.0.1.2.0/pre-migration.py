@@ -0,0 +1,21 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+
+def migrate(cr, version):
+    """Fill the new stored pending to receive flag of the purchase orders
+    from their lines, to avoid recomputing it for every order."""
+    cr.execute(
+        """
+        ALTER TABLE purchase_order
+        ADD COLUMN IF NOT EXISTS pending_to_receive boolean
+        """
+    )
+    cr.execute(
+        """
+        UPDATE purchase_order po
+        SET pending_to_receive = EXISTS (
+            SELECT 1 FROM purchase_order_line pol
+            WHERE pol.order_id = po.id AND pol.pending_to_receive
+        )
+        """
+    )
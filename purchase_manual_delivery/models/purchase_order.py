@@ -8,19 +8,20 @@ from odoo.tools import float_compare
 class PurchaseOrder(models.Model):
     _inherit = "purchase.order"
 
-    pending_to_receive = fields.Boolean(compute="_compute_pending_to_receive")
+    pending_to_receive = fields.Boolean(
+        compute="_compute_pending_to_receive", store=True, index=True
+    )
     manual_delivery = fields.Boolean(
         string="Purchase manual delivery?",
         default=lambda self: self.env.company.purchase_manual_delivery,
     )
 
+    @api.depends("order_line.pending_to_receive")
     def _compute_pending_to_receive(self):
         for order in self:
-            order.pending_to_receive = True
-            if all(
-                val is False for val in order.mapped("order_line.pending_to_receive")
-            ):
-                order.pending_to_receive = False
+            order.pending_to_receive = any(
+                line.pending_to_receive for line in order.order_line
+            )
 
     def button_confirm_manual(self):
         return super(
@@ -48,10 +49,90 @@ class PurchaseOrderLine(models.Model):
     pending_to_receive = fields.Boolean(
         compute="_compute_existing_qty",
         store=True,
+        index=True,
         string="Pending Qty to Receive",
         help="There is pending quantity to receive not yet planned",
     )
 
+    def _get_existing_quantities(self):
+        """Quantities already planned or shipped for the lines, expressed in
+        the line UoM.
+
+        The moves are summed in the database by line, UoM, source location
+        and refund flag, the returns of dropshipped moves being the only
+        ones checked move by move.
+        :return: dict {line: quantity}
+        """
+        res = dict.fromkeys(self, 0.0)
+        lines_by_id = {}
+        for line in self:
+            if line._origin.id:
+                lines_by_id.setdefault(line._origin.id, []).append(line)
+        if not lines_by_id:
+            return res
+        move_model = self.env["stock.move"]
+        domain = [
+            ("purchase_line_id", "in", list(lines_by_id)),
+            ("state", "!=", "cancel"),
+        ]
+        groups = [
+            (
+                group["purchase_line_id"][0],
+                group["product_uom"][0],
+                group["location_id"][0],
+                group["to_refund"],
+                group["product_uom_qty"],
+            )
+            for group in move_model.read_group(
+                domain + [("origin_returned_move_id", "=", False)],
+                ["product_uom_qty:sum"],
+                ["purchase_line_id", "product_uom", "location_id", "to_refund"],
+                lazy=False,
+            )
+        ]
+        for move in move_model.search(
+            domain + [("origin_returned_move_id", "!=", False)]
+        ):
+            order = move.purchase_line_id.order_id
+            if (
+                move.location_id != order.picking_type_id.default_location_dest_id
+                and move.origin_returned_move_id._is_dropshipped()
+                and not move._is_dropshipped_returned()
+            ):
+                # Edge case: the dropship is returned to the stock,
+                # no to the supplier.
+                # In this case, the received quantity on the PO is
+                # set although we didn't receive the product
+                # physically in our stock. To avoid counting the
+                # quantity twice, we do nothing.
+                continue
+            groups.append(
+                (
+                    move.purchase_line_id.id,
+                    move.product_uom.id,
+                    move.location_id.id,
+                    move.to_refund,
+                    move.product_uom_qty,
+                )
+            )
+        uoms = self.env["uom.uom"].browse({group[1] for group in groups})
+        uoms_by_id = {uom.id: uom for uom in uoms}
+        for line_id, uom_id, location_id, to_refund, qty in groups:
+            for line in lines_by_id[line_id]:
+                sign = 1
+                if (
+                    location_id
+                    == line.order_id.picking_type_id.default_location_dest_id.id
+                ):
+                    # This is a return to vendor
+                    if not to_refund:
+                        continue
+                    sign = -1
+                res[line] += sign * uoms_by_id[uom_id]._compute_quantity(
+                    qty, line.product_uom
+                )
+        return res
+
     @api.depends(
         "move_ids",
         "move_ids.state",
@@ -60,47 +141,17 @@ class PurchaseOrderLine(models.Model):
         "product_uom_qty",
     )
     def _compute_existing_qty(self):
+        precision_digits = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        existing_quantities = self._get_existing_quantities()
         for line in self:
-            precision_digits = self.env["decimal.precision"].precision_get(
-                "Product Unit of Measure"
-            )
-            total = 0.0
-            for move in line.move_ids:
-                if move.state not in ["cancel"]:
-                    if (
-                        move.location_id
-                        == self.order_id.picking_type_id.default_location_dest_id
-                    ):
-                        # This is a return to vendor
-                        if move.to_refund:
-                            total -= move.product_uom._compute_quantity(
-                                move.product_uom_qty, line.product_uom
-                            )
-                    elif (
-                        move.origin_returned_move_id
-                        and move.origin_returned_move_id._is_dropshipped()
-                        and not move._is_dropshipped_returned()
-                    ):
-                        # Edge case: the dropship is returned to the stock,
-                        # no to the supplier.
-                        # In this case, the received quantity on the PO is
-                        # set although we didn't receive the product
-                        # physically in our stock. To avoid counting the
-                        # quantity twice, we do nothing.
-                        pass
-                    else:
-                        total += move.product_uom._compute_quantity(
-                            move.product_uom_qty, line.product_uom
-                        )
-            line.existing_qty = total
-            if (
+            line.existing_qty = existing_quantities[line]
+            line.pending_to_receive = (
                 float_compare(
                     line.product_qty,
                     line.existing_qty,
                     precision_digits=precision_digits,
                 )
                 == 1
-            ):
-                line.pending_to_receive = True
-            else:
-                line.pending_to_receive = False
+            )
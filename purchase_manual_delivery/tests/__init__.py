@@ -1 +1,2 @@
 from . import test_purchase_manual_delivery
+from . import test_purchase_manual_delivery_benchmark
@@ -301,3 +301,92 @@ class TestPurchaseManualDelivery(TransactionCase):
 
         # The PO Line should not be pending to receive
         self.assertFalse(po_existing_bigger.pending_to_receive)
+
+    def test_05_pending_to_receive_batch(self):
+        """
+        Existing quantities of lines of several orders are computed together
+        and the pending to receive flag of the orders can be searched
+        """
+        orders = self.po1 | self.po2
+        orders.button_confirm_manual()
+        wizard = (
+            self.env["create.stock.picking.wizard"]
+            .with_context(
+                **{
+                    "active_model": "purchase.order.line",
+                    "active_ids": self.po2.order_line.ids,
+                }
+            )
+            .create({})
+        )
+        wizard.line_ids.filtered(
+            lambda l: l.purchase_order_line_id == self.po2_line2
+        ).qty = 2
+        wizard.create_stock_picking()
+        lines = orders.order_line
+        self.assertEqual(
+            lines._get_existing_quantities(),
+            {
+                self.po1_line1: 0.0,
+                self.po1_line2: 0.0,
+                self.po2_line1: 10.0,
+                self.po2_line2: 2.0,
+            },
+        )
+        self.assertFalse(self.po2_line1.pending_to_receive)
+        self.assertTrue(self.po2_line2.pending_to_receive)
+        self.assertEqual(
+            self.purchase_order_obj.search(
+                [("id", "in", orders.ids), ("pending_to_receive", "=", True)]
+            ),
+            orders,
+        )
+        wizard = (
+            self.env["create.stock.picking.wizard"]
+            .with_context(
+                **{
+                    "active_model": "purchase.order.line",
+                    "active_ids": self.po2_line2.ids,
+                }
+            )
+            .create({})
+        )
+        wizard.create_stock_picking()
+        self.assertFalse(self.po2.pending_to_receive)
+        self.assertEqual(
+            self.purchase_order_obj.search(
+                [("id", "in", orders.ids), ("pending_to_receive", "=", True)]
+            ),
+            self.po1,
+        )
+
+    def test_06_create_stock_pickings_batch(self):
+        """
+        Create one incoming shipment for lines of several purchase orders of
+        the same vendor
+        """
+        orders = self.po1 | self.po2
+        orders.button_confirm_manual()
+        wizard_model = self.env["create.stock.picking.wizard"]
+        with self.assertRaises(UserError):
+            wizard_model.create_stock_pickings_batch(
+                orders.order_line, quantities={self.po1_line1.id: 43.0}
+            )
+        pickings = wizard_model.create_stock_pickings_batch(
+            orders.order_line, quantities={self.po1_line1.id: 2.0}
+        )
+        self.assertEqual(len(pickings), 1)
+        self.assertEqual(self.po1.picking_ids, pickings)
+        self.assertEqual(self.po2.picking_ids, pickings)
+        self.assertEqual(len(pickings.move_ids), 4)
+        self.assertEqual(pickings.state, "assigned")
+        self.assertEqual(self.po1_line1.existing_qty, 2.0)
+        self.assertTrue(self.po1_line1.pending_to_receive)
+        self.assertFalse(
+            (orders.order_line - self.po1_line1).filtered("pending_to_receive")
+        )
+        # Only the remaining quantity is received afterwards
+        pickings = wizard_model.create_stock_pickings_batch(orders.order_line)
+        self.assertEqual(pickings.move_ids.purchase_line_id, self.po1_line1)
+        self.assertEqual(pickings.move_ids.product_uom_qty, 40.0)
+        self.assertFalse(orders.filtered("pending_to_receive"))
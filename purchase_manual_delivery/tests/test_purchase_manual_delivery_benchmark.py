@@ -0,0 +1,93 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+import logging
+import time
+
+from odoo import fields
+from odoo.tests import common, tagged
+
+_logger = logging.getLogger(__name__)
+
+ORDER_COUNT = 50
+LINES_PER_ORDER = 20
+
+
+@tagged("-standard", "purchase_manual_delivery_benchmark")
+class TestPurchaseManualDeliveryBenchmark(common.TransactionCase):
+    """Compare the wizard, used one order at a time, with the batch receipt
+    builder. Not run by default, use
+    ``--test-tags purchase_manual_delivery_benchmark``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.env.company.purchase_manual_delivery = True
+        partner = self.env["res.partner"].create({"name": "Benchmark vendor"})
+        products = self.env["product.product"].create(
+            [
+                {"name": "Benchmark %s" % i, "type": "product"}
+                for i in range(LINES_PER_ORDER)
+            ]
+        )
+        order_lines = [
+            (
+                0,
+                0,
+                {
+                    "product_id": product.id,
+                    "product_uom": product.uom_id.id,
+                    "name": product.name,
+                    "price_unit": 10.0,
+                    "date_planned": fields.Datetime.now(),
+                    "product_qty": 5.0,
+                },
+            )
+            for product in products
+        ]
+        orders = self.env["purchase.order"].create(
+            [
+                {"partner_id": partner.id, "order_line": order_lines}
+                for __ in range(2 * ORDER_COUNT)
+            ]
+        )
+        orders.button_confirm_manual()
+        self.wizard_orders = orders[:ORDER_COUNT]
+        self.batch_orders = orders[ORDER_COUNT:]
+        self.env.flush_all()
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        res = method(*args)
+        self.env.flush_all()
+        return res, time.perf_counter() - start
+
+    def _receive_one_order_at_a_time(self, orders):
+        Wizard = self.env["create.stock.picking.wizard"]
+        for order in orders:
+            Wizard.with_context(
+                active_model="purchase.order",
+                active_id=order.id,
+                active_ids=order.ids,
+            ).create({}).create_stock_picking()
+
+    def test_create_stock_pickings(self):
+        __, wizard_time = self._timed(
+            self._receive_one_order_at_a_time, self.wizard_orders
+        )
+        pickings, batch_time = self._timed(
+            self.env["create.stock.picking.wizard"].create_stock_pickings_batch,
+            self.batch_orders.order_line,
+        )
+        _logger.info(
+            "Receipt of %d orders of %d lines: %.3fs with the wizard, "
+            "%.3fs with the batch receipt builder",
+            ORDER_COUNT,
+            LINES_PER_ORDER,
+            wizard_time,
+            batch_time,
+        )
+        self.assertFalse(self.wizard_orders.filtered("pending_to_receive"))
+        self.assertEqual(len(pickings), 1)
+        self.assertEqual(
+            pickings.move_ids.purchase_line_id, self.batch_orders.order_line
+        )
+        self.assertFalse(self.batch_orders.filtered("pending_to_receive"))
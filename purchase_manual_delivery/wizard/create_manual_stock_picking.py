@@ -3,6 +3,7 @@
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import float_compare
 
 
 class CreateManualStockPickingWizard(models.TransientModel):
@@ -139,14 +140,7 @@ class CreateManualStockPickingWizard(models.TransientModel):
                 )
             )
         moves = self.line_ids._create_stock_moves(picking_id)
-        moves = moves.filtered(
-            lambda x: x.state not in ("done", "cancel")
-        )._action_confirm()
-        seq = 0
-        for move in sorted(moves, key=lambda move: move.date_deadline or move.date):
-            seq += 5
-            move.sequence = seq
-        moves._action_assign()
+        self._confirm_stock_moves(moves)
         picking_id.message_post_with_view(
             "mail.message_origin_link",
             values={"self": picking_id, "origin": self.purchase_id},
@@ -162,6 +156,147 @@ class CreateManualStockPickingWizard(models.TransientModel):
             "type": "ir.actions.act_window",
         }
 
+    @api.model
+    def _confirm_stock_moves(self, moves):
+        """Confirm and reserve the moves, sequenced by deadline in each
+        picking."""
+        moves = moves.filtered(
+            lambda x: x.state not in ("done", "cancel")
+        )._action_confirm()
+        moves_by_picking = {}
+        for move in moves:
+            moves_by_picking.setdefault(move.picking_id, []).append(move)
+        move_ids_by_sequence = {}
+        for picking_moves in moves_by_picking.values():
+            seq = 0
+            for move in sorted(
+                picking_moves, key=lambda move: move.date_deadline or move.date
+            ):
+                seq += 5
+                move_ids_by_sequence.setdefault(seq, []).append(move.id)
+        for seq, move_ids in move_ids_by_sequence.items():
+            self.env["stock.move"].browse(move_ids).sequence = seq
+        moves._action_assign()
+        return moves
+
+    # ----------------------------------------
+    # Batch receipts
+    # ----------------------------------------
+
+    @api.model
+    def _get_batch_picking_key(self, po_line):
+        """Purchase lines sharing the same key are received in the same
+        picking."""
+        order = po_line.order_id
+        return (
+            order.company_id,
+            order.partner_id,
+            order.picking_type_id,
+            order._get_destination_location(),
+        )
+
+    @api.model
+    def _prepare_batch_picking(self, purchase_orders, location_dest=None):
+        """Values of the picking receiving lines of several orders."""
+        res = purchase_orders[:1]._prepare_picking()
+        res["origin"] = ", ".join(purchase_orders.mapped("name"))
+        if location_dest:
+            res["location_dest_id"] = location_dest.id
+        return res
+
+    @api.model
+    def create_stock_pickings_batch(
+        self, purchase_lines, quantities=None, location_dest=None
+    ):
+        """Create the incoming shipments of purchase lines of several orders
+        at once: one picking per vendor, picking type and destination, all
+        the moves being created, confirmed and reserved together.
+        :param purchase_lines : recordset of purchase.order.line
+        :param quantities : optional dict {purchase line id: quantity to
+        receive}, the remaining quantity of the line by default
+        :param location_dest : optional destination stock.location
+        :return: recordset of the created stock.picking
+        """
+        purchase_lines = purchase_lines.filtered(
+            lambda p: p.product_id.type in ["product", "consu"]
+            and p.pending_to_receive
+        )
+        precision_digits = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        existing_quantities = purchase_lines._get_existing_quantities()
+        quantities = quantities or {}
+        lines_by_key = {}
+        qty_by_line = {}
+        for line in purchase_lines:
+            remaining_qty = line.product_qty - existing_quantities[line]
+            qty = quantities.get(line.id, remaining_qty)
+            if qty > remaining_qty:
+                raise UserError(
+                    _(
+                        "You can not receive more than the remaining "
+                        "quantity. If you need to do so, please edit "
+                        "the purchase order first."
+                    )
+                )
+            if float_compare(qty, 0.0, precision_digits=precision_digits) <= 0:
+                continue
+            qty_by_line[line] = qty
+            lines_by_key.setdefault(self._get_batch_picking_key(line), []).append(
+                line
+            )
+        if not lines_by_key:
+            return self.env["stock.picking"]
+        purchase_orders_list = [
+            self.env["purchase.order"].browse(
+                list(dict.fromkeys(line.order_id.id for line in lines))
+            )
+            for lines in lines_by_key.values()
+        ]
+        pickings = self.env["stock.picking"].create(
+            [
+                self._prepare_batch_picking(purchase_orders, location_dest)
+                for purchase_orders in purchase_orders_list
+            ]
+        )
+        # The moves are prepared by wizard lines in memory, so both ways of
+        # receiving purchase lines give the same moves
+        WizardLine = self.env["create.stock.picking.wizard.line"]
+        move_vals = []
+        for picking, lines in zip(pickings, lines_by_key.values()):
+            wizard_lines = WizardLine.concat(
+                *(
+                    WizardLine.new(
+                        {"purchase_order_line_id": line.id, "qty": qty_by_line[line]}
+                    )
+                    for line in lines
+                )
+            )
+            move_vals += wizard_lines._prepare_stock_move_values(
+                picking, location_dest
+            )
+        moves = self.env["stock.move"].create(move_vals)
+        self._confirm_stock_moves(moves)
+        note_subtype = self.env.ref("mail.mt_note")
+        for picking, purchase_orders in zip(pickings, purchase_orders_list):
+            picking.message_post_with_view(
+                "mail.message_origin_link",
+                values={"self": picking, "origin": purchase_orders},
+                subtype_id=note_subtype.id,
+            )
+        return pickings
+
+    @api.model
+    def action_create_stock_pickings_batch(self, purchase_lines):
+        """Create the incoming shipments of the selected purchase lines
+        and show them."""
+        pickings = self.create_stock_pickings_batch(purchase_lines)
+        action = self.env["ir.actions.actions"]._for_xml_id(
+            "stock.action_picking_tree_all"
+        )
+        action["domain"] = [("id", "in", pickings.ids)]
+        return action
+
 
 class CreateManualStockPickingWizardLine(models.TransientModel):
     _name = "create.stock.picking.wizard.line"
@@ -230,7 +365,14 @@ class CreateManualStockPickingWizardLine(models.TransientModel):
         po_line = self.purchase_order_line_id
         return po_line._prepare_stock_moves(picking)
 
-    def _create_stock_moves(self, picking):
+    def _prepare_stock_move_values(self, picking, location_dest=None):
+        """Values of the moves receiving the quantity to receive of the lines
+        in the picking.
+
+        :param picking: stock.picking the moves are created in
+        :param location_dest: optional destination stock.location of the moves
+        :return: list of stock.move values
+        """
         values = []
         for line in self:
             for val in line._prepare_stock_moves(picking):
@@ -245,11 +387,16 @@ class CreateManualStockPickingWizardLine(models.TransientModel):
                         product_uom,
                         rounding_method="HALF-UP",
                     )
-                if (
-                    val.get("location_dest_id", False)
-                    and not line.wizard_id.picking_id
-                    and line.wizard_id.location_dest_id
-                ):
-                    val["location_dest_id"] = line.wizard_id.location_dest_id.id
+                if val.get("location_dest_id", False) and location_dest:
+                    val["location_dest_id"] = location_dest.id
                 values.append(val)
+        return values
+
+    def _create_stock_moves(self, picking):
+        values = []
+        for line in self:
+            location_dest = None
+            if not line.wizard_id.picking_id and line.wizard_id.location_dest_id:
+                location_dest = line.wizard_id.location_dest_id
+            values += line._prepare_stock_move_values(picking, location_dest)
         return self.env["stock.move"].create(values)
@@ -3,7 +3,7 @@
 {
     "name": "Purchase Merge",
     "summary": "Wizard to merge purchase with required conditions",
-    "version": "16.0.1.0.3",
+    "version": "16.0.1.2.0",
     "author": "Camptocamp, Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/purchase-workflow",
     "license": "AGPL-3",
@@ -11,6 +11,7 @@
     "depends": ["purchase_order_approved"],
     "data": [
         "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "wizard/purchase_merge_views.xml",
     ],
     "external_dependencies": {"python": ["openupgradelib"]},
@@ -306,3 +306,173 @@ class TestPurchaseMerge(common.TransactionCase):
             r"You can't merge purchase orders with different suppliers: .+",
         ):
             purchase_merge._check_all_values(purchase_merge.purchase_ids)
+
+    def test_merge_compatible_purchases(self):
+        partner = self.env["res.partner"].create({"name": "Partner 3"})
+        purchases = self.PurchaseOrder.create(
+            [
+                {
+                    "partner_id": partner.id,
+                    "order_line": [
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": product.id,
+                                "price_unit": 10,
+                                "date_planned": "2026-01-01 00:00:00",
+                            },
+                        )
+                    ],
+                }
+                for product in (self.product_1, self.product_1, self.product_2)
+            ]
+        )
+        purchase_incoterm = self.PurchaseOrder.create(
+            {
+                "partner_id": partner.id,
+                "incoterm_id": self.incoterm_1.id,
+                "order_line": [
+                    (0, 0, {"product_id": self.product_1.id, "price_unit": 10})
+                ],
+            }
+        )
+        groups = self.PurchaseMerge._get_mergeable_purchase_groups(
+            [("partner_id", "=", partner.id)]
+        )
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0], purchases)
+        stats = self.PurchaseMerge._merge_compatible_purchases(
+            [("partner_id", "=", partner.id)]
+        )
+        self.assertEqual(stats["groups"], 1)
+        self.assertEqual(stats["merged_orders"], 2)
+        self.assertEqual(stats["consolidated_lines"], 1)
+        dst_purchase = purchases.filtered(lambda p: p.state == "draft")
+        self.assertEqual(len(dst_purchase), 1)
+        self.assertEqual(purchase_incoterm.state, "draft")
+        self.assertEqual(len(dst_purchase.order_line), 2)
+        line_1 = dst_purchase.order_line.filtered(
+            lambda l: l.product_id == self.product_1
+        )
+        self.assertEqual(line_1.product_qty, 2)
+
+    def test_merge_compatible_purchases_move_dest(self):
+        partner = self.env["res.partner"].create({"name": "Partner 4"})
+        stock_location = self.env.ref("stock.stock_location_stock")
+        customer_location = self.env.ref("stock.stock_location_customers")
+        moves = self.env["stock.move"].create(
+            [
+                {
+                    "name": self.product_1.name,
+                    "product_id": self.product_1.id,
+                    "product_uom_qty": 1,
+                    "product_uom": self.product_1.uom_id.id,
+                    "location_id": stock_location.id,
+                    "location_dest_id": customer_location.id,
+                }
+                for _i in range(2)
+            ]
+        )
+        purchases = self.PurchaseOrder.create(
+            [
+                {
+                    "partner_id": partner.id,
+                    "order_line": [
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": self.product_1.id,
+                                "price_unit": 10,
+                                "date_planned": "2026-01-01 00:00:00",
+                                "move_dest_ids": [(4, move.id)],
+                            },
+                        )
+                    ],
+                }
+                for move in moves
+            ]
+            + [
+                {
+                    "partner_id": partner.id,
+                    "order_line": [
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": self.product_1.id,
+                                "price_unit": 10,
+                                "date_planned": "2026-02-01 00:00:00",
+                            },
+                        )
+                    ],
+                }
+            ]
+        )
+        stats = self.PurchaseMerge._merge_compatible_purchases(
+            [("partner_id", "=", partner.id)]
+        )
+        self.assertEqual(stats["consolidated_lines"], 1)
+        dst_purchase = purchases.filtered(lambda p: p.state == "draft")
+        # Lines scheduled at another date are kept apart
+        self.assertEqual(len(dst_purchase.order_line), 2)
+        line = dst_purchase.order_line.filtered(lambda l: l.move_dest_ids)
+        self.assertEqual(line.product_qty, 2)
+        self.assertEqual(line.move_dest_ids, moves)
+        self.assertEqual(moves.created_purchase_line_id, line)
+
+    def test_merge_references(self):
+        many2ones, many2manys, _unknown = self.PurchaseMerge._get_purchase_references()
+        self.assertNotIn(("purchase.order.line", "order_id"), many2ones)
+        for model_name, fname in many2manys:
+            self.assertEqual(self.env[model_name]._fields[fname].type, "many2many")
+        attachment = self.env["ir.attachment"].create(
+            {
+                "name": "quotation.txt",
+                "res_model": "purchase.order",
+                "res_id": self.purchase_order_1.id,
+            }
+        )
+        self.purchase_order_1.message_post(body="Source message")
+        purchase_merge = self.PurchaseMerge.create(
+            {
+                "purchase_ids": [
+                    (6, 0, [self.purchase_order_1.id, self.purchase_order_2.id])
+                ],
+                "dst_purchase_id": self.purchase_order_2.id,
+            }
+        )
+        purchase_merge.action_merge()
+        self.assertEqual(attachment.res_id, self.purchase_order_2.id)
+        self.assertIn(
+            "Source message",
+            "".join(self.purchase_order_2.message_ids.mapped("body")),
+        )
+        self.assertEqual(len(self.purchase_order_2.order_line), 2)
+        self.assertEqual(self.purchase_order_1.state, "cancel")
+
+    def test_merge_many2many_references(self):
+        purchase_merges = self.PurchaseMerge.create(
+            [
+                {"purchase_ids": [(6, 0, self.purchase_order_1.ids)]},
+                {
+                    "purchase_ids": [
+                        (6, 0, (self.purchase_order_1 + self.purchase_order_2).ids)
+                    ],
+                },
+            ]
+        )
+        self.env.flush_all()
+        records = self.PurchaseMerge._move_many2many_references(
+            self.PurchaseMerge._name,
+            "purchase_ids",
+            {
+                "dst_id": self.purchase_order_2.id,
+                "src_ids": tuple(self.purchase_order_1.ids),
+            },
+        )
+        self.assertEqual(records, purchase_merges)
+        self.env.invalidate_all()
+        for purchase_merge in purchase_merges:
+            self.assertEqual(purchase_merge.purchase_ids, self.purchase_order_2)
@@ -1,11 +1,25 @@
 # Copyright 2022 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import logging
+import time
+
 from openupgradelib import openupgrade_merge_records
+from psycopg2 import sql
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 
+_logger = logging.getLogger(__name__)
+
+# Tables referencing purchase orders with a (model, id) pair of columns:
+# (table, model column, id column, extra condition)
+PURCHASE_GENERIC_REFERENCES = [
+    ("mail_message", "model", "res_id", ""),
+    ("mail_activity", "res_model", "res_id", ""),
+    ("ir_attachment", "res_model", "res_id", "AND res_field IS NULL"),
+]
+
 
 class MergePurchaseAutomatic(models.TransientModel):
     """
@@ -179,14 +193,9 @@ class MergePurchaseAutomatic(models.TransientModel):
         """
         if len(purchases) < 2:
             return
-        record_ids = purchases - dst_purchase
-        openupgrade_merge_records.merge_records(
-            env=self.env,
-            model_name=self._name,
-            record_ids=record_ids.ids,
-            target_record_id=dst_purchase.id,
-        )
         self._check_all_values(purchases)
+        record_ids = purchases - dst_purchase
+        self._merge_references(record_ids, dst_purchase)
 
         # remove dst_purchase from purchases to merge
         if dst_purchase and dst_purchase in purchases:
@@ -200,6 +209,293 @@ class MergePurchaseAutomatic(models.TransientModel):
         # cancel source purchase, since they are merged
         src_purchase.button_cancel()
 
+    @api.model
+    @tools.ormcache()
+    def _get_purchase_references(self):
+        """Map of the references to purchase orders, computed once from the
+        registry.
+        :return: tuple (many2ones, many2manys, unknown) where many2ones and
+        many2manys are the (model, field) of the stored fields pointing to
+        purchase orders and unknown tells whether other references exist
+        that only the generic merge handles
+        """
+        many2ones = []
+        many2manys = []
+        unknown = False
+        for model_name in self.env.registry:
+            model = self.env[model_name]
+            if model._abstract or model._transient or not model._auto:
+                continue
+            for field in model._fields.values():
+                if (
+                    field.comodel_name != "purchase.order"
+                    or not field.store
+                    or field.compute
+                ):
+                    continue
+                # order lines are moved by `_update_values`, so that the
+                # amounts of the destination order are recomputed
+                if (model_name, field.name) == ("purchase.order.line", "order_id"):
+                    continue
+                if field.type == "many2one":
+                    many2ones.append((model_name, field.name))
+                # both columns of a relation between purchase orders would
+                # have to be moved
+                elif field.type == "many2many" and model_name != "purchase.order":
+                    many2manys.append((model_name, field.name))
+                # one2many fields have no column, they follow the many2one
+                elif field.type != "one2many":
+                    unknown = True
+        return tuple(many2ones), tuple(many2manys), unknown
+
+    def _move_many2one_references(self, model_name, fname, params):
+        """Point the fname many2one of the records of model_name from the
+        source orders to the destination order, and return the moved
+        records."""
+        records = self.env[model_name]
+        self.env.cr.execute(
+            sql.SQL("SELECT id FROM {table} WHERE {column} IN %(src_ids)s").format(
+                table=sql.Identifier(records._table),
+                column=sql.Identifier(fname),
+            ),
+            params,
+        )
+        records = records.browse([row[0] for row in self.env.cr.fetchall()])
+        if not records:
+            return records
+        # the stored fields depending on the source orders are marked to
+        # recompute before the move, those of the destination one after it
+        records.modified([fname], before=True)
+        self.env.cr.execute(
+            sql.SQL(
+                "UPDATE {table} SET {column} = %(dst_id)s "
+                "WHERE {column} IN %(src_ids)s RETURNING id"
+            ).format(
+                table=sql.Identifier(records._table),
+                column=sql.Identifier(fname),
+            ),
+            params,
+        )
+        return records.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _move_many2many_references(self, model_name, fname, params):
+        """Link the records of model_name related to the source orders by
+        the fname many2many to the destination order instead, and return
+        them."""
+        field = self.env[model_name]._fields[fname]
+        query_params = {
+            "relation": sql.Identifier(field.relation),
+            "record_column": sql.Identifier(field.column1),
+            "purchase_column": sql.Identifier(field.column2),
+        }
+        self.env.cr.execute(
+            sql.SQL(
+                "SELECT DISTINCT {record_column} FROM {relation} "
+                "WHERE {purchase_column} IN %(src_ids)s"
+            ).format(**query_params),
+            params,
+        )
+        records = self.env[model_name].browse(
+            [row[0] for row in self.env.cr.fetchall()]
+        )
+        if not records:
+            return records
+        records.modified([fname], before=True)
+        self.env.cr.execute(
+            sql.SQL(
+                "INSERT INTO {relation} ({record_column}, {purchase_column}) "
+                "SELECT {record_column}, %(dst_id)s FROM {relation} "
+                "WHERE {purchase_column} IN %(src_ids)s "
+                "ON CONFLICT DO NOTHING"
+            ).format(**query_params),
+            params,
+        )
+        self.env.cr.execute(
+            sql.SQL(
+                "DELETE FROM {relation} WHERE {purchase_column} IN %(src_ids)s"
+            ).format(**query_params),
+            params,
+        )
+        return records
+
+    @api.model
+    def _merge_references(self, src_purchase, dst_purchase):
+        """Move the references of src_purchase to dst_purchase. The known
+        references are moved with set-based queries, the generic merge
+        is only used when some references can't be moved that way.
+        :param src_purchase : recordset of source purchase.order
+        :param dst_purchase : record of destination purchase.order
+        """
+        many2ones, many2manys, unknown = self._get_purchase_references()
+        if unknown:
+            # The source orders are cancelled afterwards, keep them as well
+            # as the values of the destination order
+            openupgrade_merge_records.merge_records(
+                env=self.env,
+                model_name="purchase.order",
+                record_ids=src_purchase.ids,
+                target_record_id=dst_purchase.id,
+                field_spec={"openupgrade_other_fields": "preserve"},
+                delete=False,
+                exclude_columns=[("purchase_order_line", "order_id")],
+            )
+            return
+        self.env.flush_all()
+        params = {"dst_id": dst_purchase.id, "src_ids": tuple(src_purchase.ids)}
+        moved = []
+        for model_name, fname in many2ones:
+            records = self._move_many2one_references(model_name, fname, params)
+            moved.append((records, fname))
+        for model_name, fname in many2manys:
+            records = self._move_many2many_references(model_name, fname, params)
+            moved.append((records, fname))
+        for table, model_column, id_column, where in PURCHASE_GENERIC_REFERENCES:
+            self.env.cr.execute(
+                sql.SQL(
+                    "UPDATE {table} SET {id_column} = %(dst_id)s "
+                    "WHERE {model_column} = 'purchase.order' "
+                    "AND {id_column} IN %(src_ids)s " + where
+                ).format(
+                    table=sql.Identifier(table),
+                    model_column=sql.Identifier(model_column),
+                    id_column=sql.Identifier(id_column),
+                ),
+                params,
+            )
+        self.env.invalidate_all()
+        # Raw queries don't trigger the recomputations, the stored fields
+        # depending on the moved references are marked like a write would
+        for records, fname in moved:
+            if records:
+                records.modified([fname])
+
+    # ----------------------------------------
+    # Bulk merge
+    # ----------------------------------------
+
+    @api.model
+    def _get_merge_group_fields(self):
+        """Fields that must be identical for purchase orders to be merged,
+        mirrors the criteria of `_check_content`."""
+        return [
+            "company_id",
+            "partner_id",
+            "currency_id",
+            "picking_type_id",
+            "incoterm_id",
+            "payment_term_id",
+            "fiscal_position_id",
+        ]
+
+    @api.model
+    def _get_mergeable_purchase_domain(self, domain=None):
+        return [("state", "=", "draft")] + (domain or [])
+
+    @api.model
+    def _get_mergeable_purchase_groups(self, domain=None):
+        """Return the groups of draft purchase orders that can be merged
+        together, found with a single grouped query.
+        :param domain : optional domain restricting the purchase orders
+        :return: list of `purchase.order` recordsets of at least 2 records
+        """
+        groups = self.env["purchase.order"].read_group(
+            self._get_mergeable_purchase_domain(domain),
+            ["purchase_ids:array_agg(id)"],
+            self._get_merge_group_fields(),
+            lazy=False,
+        )
+        purchase_model = self.env["purchase.order"]
+        return [
+            purchase_model.browse(group["purchase_ids"])
+            for group in groups
+            if group["__count"] > 1
+        ]
+
+    @api.model
+    def _get_order_line_merge_key(self, line):
+        """Lines of a merged purchase order sharing the same key are
+        consolidated into a single line. Lines of different orderpoints,
+        scheduled dates or analytic distributions are kept apart."""
+        return (
+            line.order_id.id,
+            line.product_id.id,
+            line.product_uom.id,
+            line.price_unit,
+            tuple(sorted(line.taxes_id.ids)),
+            line.orderpoint_id.id,
+            line.date_planned,
+            tuple(sorted((line.analytic_distribution or {}).items())),
+        )
+
+    @api.model
+    def _consolidate_order_lines(self, purchases):
+        """Sum up the quantities of the identical lines of the purchase
+        orders on the first of them and remove the other ones. The moves
+        the removed lines were created for are linked to the kept line.
+        :param purchases : recordset of purchase.order
+        :return: number of removed lines
+        """
+        lines_by_key = {}
+        for line in purchases.order_line.filtered(
+            lambda l: l.product_id and not l.display_type
+        ):
+            lines_by_key.setdefault(self._get_order_line_merge_key(line), []).append(
+                line
+            )
+        to_unlink_ids = []
+        for lines in lines_by_key.values():
+            if len(lines) < 2:
+                continue
+            lines[0].write(
+                {
+                    "product_qty": sum(line.product_qty for line in lines),
+                    "move_dest_ids": [
+                        (4, move.id)
+                        for line in lines[1:]
+                        for move in line.move_dest_ids
+                    ],
+                }
+            )
+            to_unlink_ids += [line.id for line in lines[1:]]
+        self.env["purchase.order.line"].browse(to_unlink_ids).unlink()
+        return len(to_unlink_ids)
+
+    @api.model
+    def _merge_compatible_purchases(self, domain=None, consolidate_lines=True):
+        """Merge all the compatible draft purchase orders together, e.g.
+        the RFQs generated by the procurement scheduler. Each group of
+        compatible orders is merged into its oldest order.
+        :param domain : optional domain restricting the purchase orders
+        :param consolidate_lines : merge identical lines of merged orders
+        :return: dict with the statistics of the merge
+        """
+        start = time.time()
+        groups = self._get_mergeable_purchase_groups(domain)
+        dst_purchases = self.env["purchase.order"]
+        for purchases in groups:
+            dst_purchase = self._get_ordered_purchase(purchases.ids)[-1]
+            self._merge(purchases, dst_purchase)
+            dst_purchases |= dst_purchase
+        consolidated_lines = 0
+        if consolidate_lines:
+            consolidated_lines = self._consolidate_order_lines(dst_purchases)
+        duration = time.time() - start
+        merged_orders = sum(len(purchases) - 1 for purchases in groups)
+        stats = {
+            "groups": len(groups),
+            "merged_orders": merged_orders,
+            "consolidated_lines": consolidated_lines,
+            "duration": duration,
+            "orders_per_second": merged_orders / duration if duration else 0.0,
+        }
+        _logger.info(
+            "Merged %(merged_orders)d purchase orders into %(groups)d orders, "
+            "%(consolidated_lines)d lines consolidated in %(duration).2fs "
+            "(%(orders_per_second).1f orders/s)",
+            stats,
+        )
+        return stats
+
     # ----------------------------------------
     # Helpers
     # ----------------------------------------
@@ -13,6 +13,7 @@ def pre_init_hook(cr):
     of the module on an existing Odoo instance.
     """
     store_field_qty_to_receive_and_invoice(cr)
+    store_field_order_qty_to_receive_and_invoice(cr)
 
 
 def store_field_qty_to_receive_and_invoice(cr):
@@ -83,3 +84,57 @@ def store_field_qty_to_receive_and_invoice(cr):
         WHERE purchase_order_line.id = pol.purchase_line_id
         """
     )
+
+
+def store_field_order_qty_to_receive_and_invoice(cr):
+
+    cr.execute(
+        """SELECT column_name
+    FROM information_schema.columns
+    WHERE table_name='purchase_order' AND
+    column_name='qty_to_receive'"""
+    )
+    if not cr.fetchone():
+        logger.info("Creating field qty_to_receive on purchase_order")
+        cr.execute(
+            """
+            ALTER TABLE purchase_order ADD COLUMN qty_to_receive float;
+            COMMENT ON COLUMN purchase_order.qty_to_receive IS
+            'Qty to Receive';
+            """
+        )
+
+    cr.execute(
+        """SELECT column_name
+    FROM information_schema.columns
+    WHERE table_name='purchase_order' AND
+    column_name='qty_to_invoice'"""
+    )
+    if not cr.fetchone():
+        logger.info("Creating field qty_to_invoice on purchase_order")
+        cr.execute(
+            """
+            ALTER TABLE purchase_order ADD COLUMN qty_to_invoice float;
+            COMMENT ON COLUMN purchase_order.qty_to_invoice IS
+            'Qty to Bill';
+            """
+        )
+
+    logger.info(
+        "Computing values for fields qty_to_receive and qty_to_invoice"
+        " on purchase_order"
+    )
+    cr.execute(
+        """
+        UPDATE purchase_order po
+        SET qty_to_receive = COALESCE(pol.qty_to_receive, 0.0),
+            qty_to_invoice = COALESCE(pol.qty_to_invoice, 0.0)
+        FROM (SELECT o.id AS order_id,
+                  sum(l.qty_to_receive) AS qty_to_receive,
+                  sum(l.qty_to_invoice) AS qty_to_invoice
+              FROM purchase_order o
+              LEFT JOIN purchase_order_line l ON l.order_id = o.id
+              GROUP BY o.id) AS pol
+        WHERE po.id = pol.order_id
+        """
+    )
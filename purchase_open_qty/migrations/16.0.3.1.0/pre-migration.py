@@ -0,0 +1,10 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
+
+# pylint: disable=W8150
+from odoo.addons.purchase_open_qty.init_hook import (
+    store_field_order_qty_to_receive_and_invoice,
+)
+
+
+def migrate(cr, version):
+    store_field_order_qty_to_receive_and_invoice(cr)
@@ -3,7 +3,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
 from odoo import _, api, fields, models
-from odoo.tools import float_is_zero
+from odoo.tools import create_index, float_is_zero
 
 
 class PurchaseOrderLine(models.Model):
@@ -41,56 +41,79 @@ class PurchaseOrderLine(models.Model):
         store=True,
     )
 
+    def init(self):
+        # Partial indexes used by the pending quantities searches of the
+        # purchase orders
+        create_index(
+            self._cr,
+            "purchase_order_line_pending_qty_to_receive_index",
+            self._table,
+            ["order_id"],
+            where="qty_to_receive > 0",
+        )
+        create_index(
+            self._cr,
+            "purchase_order_line_pending_qty_to_invoice_index",
+            self._table,
+            ["order_id"],
+            where="qty_to_invoice > 0",
+        )
+
 
 class PurchaseOrder(models.Model):
     _inherit = "purchase.order"
 
+    @api.depends("order_line.qty_to_invoice")
     def _compute_qty_to_invoice(self):
+        for po in self:
+            po.qty_to_invoice = sum(po.order_line.mapped("qty_to_invoice"))
+
+    @api.depends("qty_to_invoice")
+    def _compute_pending_qty_to_invoice(self):
         dp = self.env["decimal.precision"].precision_get("Product Unit of Measure")
         for po in self:
-            qty_to_invoice = sum(po.mapped("order_line.qty_to_invoice"))
             po.pending_qty_to_invoice = not float_is_zero(
-                qty_to_invoice, precision_digits=dp
+                po.qty_to_invoice, precision_digits=dp
             )
-            po.qty_to_invoice = qty_to_invoice
 
+    @api.depends("order_line.qty_to_receive")
     def _compute_qty_to_receive(self):
         for po in self:
-            qty_to_receive = sum(po.mapped("order_line.qty_to_receive"))
-            po.pending_qty_to_receive = qty_to_receive > 0.0
-            po.qty_to_receive = qty_to_receive
+            po.qty_to_receive = sum(po.order_line.mapped("qty_to_receive"))
+
+    @api.depends("qty_to_receive")
+    def _compute_pending_qty_to_receive(self):
+        for po in self:
+            po.pending_qty_to_receive = po.qty_to_receive > 0.0
 
     @api.model
-    def _search_pending_qty_to_receive(self, operator, value):
+    def _search_pending_qty(self, qty_field, operator, value):
+        """Domain on the orders having a line with a positive qty_field,
+        as a sub-select on the order lines instead of a list of ids."""
         if operator != "=" or not isinstance(value, bool):
             raise ValueError(_("Unsupported search operator"))
         po_line_obj = self.env["purchase.order.line"]
-        po_lines = po_line_obj.search([("qty_to_receive", ">", 0.0)])
-        orders = po_lines.mapped("order_id")
-        if value:
-            return [("id", "in", orders.ids)]
-        else:
-            return [("id", "not in", orders.ids)]
+        po_line_obj.flush_model(["order_id"])
+        query = po_line_obj._search([(qty_field, ">", 0.0)])
+        subselect = query.subselect('"purchase_order_line"."order_id"')
+        return [("id", "inselect" if value else "not inselect", subselect)]
+
+    @api.model
+    def _search_pending_qty_to_receive(self, operator, value):
+        return self._search_pending_qty("qty_to_receive", operator, value)
 
     @api.model
     def _search_pending_qty_to_invoice(self, operator, value):
-        if operator != "=" or not isinstance(value, bool):
-            raise ValueError(_("Unsupported search operator"))
-        po_line_obj = self.env["purchase.order.line"]
-        po_lines = po_line_obj.search([("qty_to_invoice", ">", 0.0)])
-        orders = po_lines.mapped("order_id")
-        if value:
-            return [("id", "in", orders.ids)]
-        else:
-            return [("id", "not in", orders.ids)]
+        return self._search_pending_qty("qty_to_invoice", operator, value)
 
     qty_to_invoice = fields.Float(
         compute="_compute_qty_to_invoice",
         string="Qty to Bill",
         default=0.0,
+        store=True,
     )
     pending_qty_to_invoice = fields.Boolean(
-        compute="_compute_qty_to_invoice",
+        compute="_compute_pending_qty_to_invoice",
         search="_search_pending_qty_to_invoice",
         string="Pending Qty to Bill",
     )
@@ -98,9 +121,10 @@ class PurchaseOrder(models.Model):
         compute="_compute_qty_to_receive",
         string="Qty to Receive",
         default=0.0,
+        store=True,
     )
     pending_qty_to_receive = fields.Boolean(
-        compute="_compute_qty_to_receive",
+        compute="_compute_pending_qty_to_receive",
         search="_search_pending_qty_to_receive",
         string="Pending Qty to Receive",
     )
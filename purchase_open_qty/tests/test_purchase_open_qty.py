@@ -216,3 +216,33 @@ class TestPurchaseOpenQty(TransactionCase):
             self.purchase_order_line_3.qty_to_invoice,
             3.0,
         )
+
+    def test_04_stored_order_qty(self):
+        """The order quantities are stored and kept up to date from the lines"""
+        for picking in self.purchase_order_1.picking_ids:
+            picking.move_ids.write({"quantity_done": 5.0})
+            picking.button_validate()
+        self.assertEqual(
+            self.purchase_order_model.search(
+                [
+                    ("id", "=", self.purchase_order_1.id),
+                    ("qty_to_receive", "=", 0.0),
+                    ("qty_to_invoice", "=", 5.0),
+                ]
+            ),
+            self.purchase_order_1,
+        )
+        self.assertFalse(self.purchase_order_1.pending_qty_to_receive)
+        orders = self.purchase_order_1 | self.purchase_order_2
+        self.assertEqual(
+            self.purchase_order_model.search(
+                [("id", "in", orders.ids), ("pending_qty_to_receive", "=", True)]
+            ),
+            self.purchase_order_2,
+        )
+        self.assertEqual(
+            self.purchase_order_model.search(
+                [("id", "in", orders.ids), ("pending_qty_to_receive", "=", False)]
+            ),
+            self.purchase_order_1,
+        )
@@ -4,7 +4,7 @@
 {
     "name": "Purchase Order Product Recommendation",
     "summary": "Recommend products to buy to supplier based on history",
-    "version": "16.0.1.1.0",
+    "version": "16.0.1.2.0",
     "category": "Purchases",
     "website": "https://github.com/OCA/purchase-workflow",
     "author": "Tecnativa, Odoo Community Association (OCA)",
@@ -14,6 +14,8 @@
     "depends": ["purchase_stock"],
     "data": [
         "security/ir.model.access.csv",
+        "security/purchase_order_recommendation_security.xml",
+        "data/ir_cron.xml",
         "wizards/purchase_order_recommendation_view.xml",
         "views/purchase_order_view.xml",
     ],
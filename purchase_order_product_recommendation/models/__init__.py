@@ -0,0 +1,2 @@
+from . import purchase_order_recommendation_stat
+from . import stock_move_line
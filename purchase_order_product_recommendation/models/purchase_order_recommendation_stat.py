@@ -0,0 +1,193 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+STAT_PARAM = "purchase_order_product_recommendation.stat_last_write_date"
+
+
+class PurchaseOrderRecommendationStat(models.Model):
+    """Daily aggregate of the received and delivered quantities of each
+    product and warehouse. It's refreshed incrementally by a cron, so the
+    recommendation wizard only has to sum day buckets instead of grouping
+    the whole stock move line history on every change."""
+
+    _name = "purchase.order.recommendation.stat"
+    _description = "Purchase recommendation daily product statistics"
+    _order = "date desc, id"
+
+    date = fields.Date(required=True, readonly=True, index=True)
+    product_id = fields.Many2one(
+        comodel_name="product.product",
+        required=True,
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    warehouse_id = fields.Many2one(
+        comodel_name="stock.warehouse",
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    company_id = fields.Many2one(
+        comodel_name="res.company",
+        readonly=True,
+        ondelete="cascade",
+    )
+    qty_received = fields.Float(readonly=True)
+    times_received = fields.Integer(readonly=True)
+    qty_delivered = fields.Float(readonly=True)
+    times_delivered = fields.Integer(readonly=True)
+
+    def init(self):
+        self.env.cr.execute(
+            """
+            CREATE INDEX IF NOT EXISTS
+                purchase_order_recommendation_stat_date_product_index
+            ON purchase_order_recommendation_stat (date, product_id)
+            """
+        )
+
+    @api.model
+    def _get_last_write_date(self):
+        """Moment up to which the done move lines have been aggregated, or
+        False if the statistics haven't been computed yet."""
+        value = self.env["ir.config_parameter"].sudo().get_param(STAT_PARAM)
+        return value and fields.Datetime.to_datetime(value)
+
+    @api.model
+    def _refresh_stats(self, days=None):
+        """Aggregate the done move lines of the given days, replacing any
+        previous bucket for them. All the history is aggregated when no days
+        are given.
+
+        :param days: optional list of dates to aggregate
+        """
+        if days is not None and not days:
+            return
+        self.env["stock.move.line"].flush_model(
+            [
+                "date",
+                "product_id",
+                "company_id",
+                "qty_done",
+                "state",
+                "location_id",
+                "location_dest_id",
+                "picking_id",
+            ]
+        )
+        self.env["stock.picking"].flush_model(["picking_type_id"])
+        cr = self.env.cr
+        days_filter = ""
+        params = {"uid": self.env.uid}
+        if days is not None:
+            # The range on the move line date uses its index, the cast only
+            # keeps the given days inside it
+            days_filter = """
+                AND sml.date >= %(date_from)s AND sml.date < %(date_to)s
+                AND sml.date::date IN %(days)s
+            """
+            params.update(
+                date_from=min(days),
+                date_to=max(days) + timedelta(days=1),
+                days=tuple(days),
+            )
+            cr.execute(
+                """
+                DELETE FROM purchase_order_recommendation_stat
+                WHERE date IN %(days)s
+                """,
+                params,
+            )
+        else:
+            cr.execute("DELETE FROM purchase_order_recommendation_stat")
+        cr.execute(
+            """
+            INSERT INTO purchase_order_recommendation_stat (
+                date, product_id, warehouse_id, company_id,
+                qty_received, times_received, qty_delivered, times_delivered,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT
+                sml.date::date,
+                sml.product_id,
+                spt.warehouse_id,
+                sml.company_id,
+                COALESCE(SUM(sml.qty_done) FILTER (
+                    WHERE src.usage = 'supplier' AND dst.usage = 'internal'
+                ), 0.0),
+                COUNT(*) FILTER (
+                    WHERE src.usage = 'supplier' AND dst.usage = 'internal'
+                ),
+                COALESCE(SUM(sml.qty_done) FILTER (
+                    WHERE src.usage = 'internal' AND dst.usage = 'customer'
+                ), 0.0),
+                COUNT(*) FILTER (
+                    WHERE src.usage = 'internal' AND dst.usage = 'customer'
+                ),
+                %(uid)s, NOW() AT TIME ZONE 'UTC',
+                %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM stock_move_line sml
+            JOIN stock_location src ON src.id = sml.location_id
+            JOIN stock_location dst ON dst.id = sml.location_dest_id
+            LEFT JOIN stock_picking sp ON sp.id = sml.picking_id
+            LEFT JOIN stock_picking_type spt ON spt.id = sp.picking_type_id
+            WHERE sml.state = 'done'
+                AND (
+                    (src.usage = 'supplier' AND dst.usage = 'internal')
+                    OR (src.usage = 'internal' AND dst.usage = 'customer')
+                )
+                {days_filter}
+            GROUP BY sml.date::date, sml.product_id, spt.warehouse_id,
+                sml.company_id
+            """.format(
+                days_filter=days_filter
+            ),
+            params,
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_left_days(self, days):
+        """Recompute the days done move lines have been removed from, as
+        deleted or re-dated lines aren't found by the cron in them anymore.
+
+        :param days: iterable of dates
+        """
+        if days and self._get_last_write_date():
+            self._refresh_stats(days=list(days))
+
+    @api.model
+    def cron_update_stats(self):
+        """Aggregate the move lines done or modified since the last run. Only
+        the affected days are recomputed, so the process is idempotent and its
+        cost depends on the activity since the previous execution. The days
+        move lines leave are recomputed when they're re-dated or deleted."""
+        cr = self.env.cr
+        last_write_date = self._get_last_write_date()
+        cr.execute("SELECT MAX(write_date) FROM stock_move_line WHERE state = 'done'")
+        max_write_date = cr.fetchone()[0]
+        if not last_write_date:
+            self._refresh_stats()
+        elif max_write_date and max_write_date >= last_write_date:
+            # Lines sharing the last processed write date could have been
+            # committed afterwards, so they're processed again. It's harmless
+            # as days are always fully recomputed.
+            cr.execute(
+                """
+                SELECT DISTINCT date::date
+                FROM stock_move_line
+                WHERE state = 'done' AND write_date >= %s
+                """,
+                (last_write_date,),
+            )
+            self._refresh_stats(days=[row[0] for row in cr.fetchall()])
+        if max_write_date or not last_write_date:
+            self.env["ir.config_parameter"].sudo().set_param(
+                STAT_PARAM,
+                fields.Datetime.to_string(max_write_date or fields.Datetime.now()),
+            )
+        return True
@@ -0,0 +1,46 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import models
+from odoo.tools import create_index
+
+
+class StockMoveLine(models.Model):
+    _inherit = "stock.move.line"
+
+    def init(self):
+        super().init()
+        # Partial indexes used by the incremental update of the purchase
+        # recommendation statistics
+        create_index(
+            self._cr,
+            "stock_move_line_done_write_date_index",
+            self._table,
+            ["write_date"],
+            where="state = 'done'",
+        )
+        create_index(
+            self._cr,
+            "stock_move_line_done_date_index",
+            self._table,
+            ["date"],
+            where="state = 'done'",
+        )
+
+    def _get_recommendation_stat_days(self):
+        """Days of the purchase recommendation statistics the done lines are
+        aggregated in."""
+        return {line.date.date() for line in self if line.state == "done"}
+
+    def write(self, vals):
+        days = set()
+        if "date" in vals or vals.get("state", "done") != "done":
+            days = self._get_recommendation_stat_days()
+        res = super().write(vals)
+        self.env["purchase.order.recommendation.stat"]._refresh_left_days(days)
+        return res
+
+    def unlink(self):
+        days = self._get_recommendation_stat_days()
+        res = super().unlink()
+        self.env["purchase.order.recommendation.stat"]._refresh_left_days(days)
+        return res
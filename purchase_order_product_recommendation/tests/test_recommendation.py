@@ -2,11 +2,15 @@
 # Copyright 2020 Manuel Calero - Tecnativa
 # Copyright 2020 Tecnativa - Pedro M. Baeza
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+from unittest.mock import patch
+
 from odoo import fields
 from odoo.tests.common import TransactionCase
 
 from odoo.addons.base.tests.common import DISABLED_MAIL_CONTEXT
 
+from ..models.purchase_order_recommendation_stat import STAT_PARAM
+
 
 class RecommendationCase(TransactionCase):
     @classmethod
@@ -244,6 +248,132 @@ class RecommendationCaseTests(RecommendationCase):
         self.assertEqual(line_prod_3.units_available, 5)
         self.assertEqual(line_prod_3.units_virtual_available, 5)
 
+    def test_products_availability(self):
+        """Stock availability is computed in bulk for all the products"""
+        wizard = self.wizard()
+        products = self.prod_1 + self.prod_3
+        availability = wizard._get_products_availability(products)
+        self.assertEqual(availability[self.prod_1.id], (0, 0))
+        self.assertEqual(availability[self.prod_3.id], (5, 5))
+        wizard.warehouse_ids = self.wh2
+        availability = wizard._get_products_availability(products)
+        self.assertEqual(availability[self.prod_3.id], (3, 3))
+        wizard.warehouse_ids |= self.wh1
+        availability = wizard._get_products_availability(products)
+        self.assertEqual(availability[self.prod_3.id], (5, 5))
+
+    def test_recommendations_from_stats(self):
+        """Daily statistics give the same results as the move lines"""
+        stat_obj = self.env["purchase.order.recommendation.stat"]
+        stat_obj.cron_update_stats()
+        stats = stat_obj.search([("product_id", "=", self.prod_2.id)])
+        self.assertEqual(sum(stats.mapped("qty_delivered")), 42)
+        self.assertEqual(sum(stats.mapped("times_delivered")), 2)
+        self.assertEqual(stats.warehouse_id, self.wh1 + self.wh2)
+        # Every move line has been aggregated: just the statistics are read
+        self.env["ir.config_parameter"].sudo().set_param(
+            STAT_PARAM, "2100-01-01 00:00:00"
+        )
+        wizard = self.wizard()
+        wizard.date_begin = wizard.date_end = fields.Date.from_string("2019-02-01")
+        wizard.warehouse_ids = self.wh2
+        wizard._generate_recommendations()
+        line_prod_2 = wizard.line_ids.filtered(lambda x: x.product_id == self.prod_2)
+        self.assertEqual(line_prod_2.times_delivered, 1)
+        self.assertEqual(line_prod_2.units_delivered, 4)
+        wizard.warehouse_ids = False
+        wizard._generate_recommendations()
+        line_prod_3 = wizard.line_ids.filtered(lambda x: x.product_id == self.prod_3)
+        self.assertEqual(line_prod_3.times_delivered, 1)
+        self.assertEqual(line_prod_3.units_delivered, 13)
+        self.assertEqual(line_prod_3.units_received, 7)
+        # New activity after the last update is read from the move lines
+        # without counting twice the already aggregated days
+        self.env["ir.config_parameter"].sudo().set_param(STAT_PARAM, False)
+        stat_obj.cron_update_stats()
+        self.move_line.create(
+            {
+                "product_id": self.prod_2.id,
+                "product_uom_id": self.prod_2.uom_id.id,
+                "qty_done": 3,
+                "date": fields.Datetime.from_string("2019-02-01 10:00:00"),
+                "location_id": self.wh2.lot_stock_id.id,
+                "location_dest_id": self.customer_loc.id,
+                "picking_id": self.picking_2.id,
+            }
+        ).write({"state": "done"})
+        wizard._generate_recommendations()
+        line_prod_2 = wizard.line_ids.filtered(lambda x: x.product_id == self.prod_2)
+        self.assertEqual(line_prod_2.times_delivered, 3)
+        self.assertEqual(line_prod_2.units_delivered, 45)
+
+    def test_recommendations_from_stats_extended_domain(self):
+        """Extensions of the move lines domain are applied with statistics"""
+        self.env["purchase.order.recommendation.stat"].cron_update_stats()
+        self.env["ir.config_parameter"].sudo().set_param(
+            STAT_PARAM, "2100-01-01 00:00:00"
+        )
+        wizard = self.wizard()
+        wizard.date_begin = wizard.date_end = fields.Date.from_string("2019-02-01")
+        wizard_class = type(wizard)
+        get_move_line_domain = wizard_class._get_move_line_domain
+
+        def _get_move_line_domain(self, products, src, dst):
+            domain = get_move_line_domain(self, products, src, dst)
+            return domain + [("qty_done", "<", 10)]
+
+        with patch.object(wizard_class, "_get_move_line_domain", _get_move_line_domain):
+            wizard._generate_recommendations()
+        line_prod_3 = wizard.line_ids.filtered(lambda x: x.product_id == self.prod_3)
+        self.assertEqual(line_prod_3.times_delivered, 0)
+        self.assertEqual(line_prod_3.units_received, 7)
+
+    def test_stats_redated_move_line(self):
+        """The day a done move line leaves is recomputed"""
+        stat_obj = self.env["purchase.order.recommendation.stat"]
+        stat_obj.cron_update_stats()
+        domain = [("product_id", "=", self.prod_3.id)]
+        move_line = self.move_line.filtered(
+            lambda x: x.product_id == self.prod_3 and x.qty_done == 13
+        )
+        move_line.date = fields.Datetime.from_string("2019-02-02 10:00:00")
+        stats = stat_obj.search(domain + [("date", "=", "2019-02-01")])
+        self.assertEqual(sum(stats.mapped("qty_delivered")), 0)
+        self.assertEqual(sum(stats.mapped("qty_received")), 7)
+        stat_obj.cron_update_stats()
+        stats = stat_obj.search(domain + [("date", "=", "2019-02-02")])
+        self.assertEqual(sum(stats.mapped("qty_delivered")), 13)
+
+    def test_select_sellers(self):
+        """Batch seller selection matches the product one"""
+        self.env["product.supplierinfo"].create(
+            {
+                "partner_id": self.partner.id,
+                "product_tmpl_id": self.prod_1.product_tmpl_id.id,
+                "min_qty": 10,
+                "price": 4,
+            }
+        )
+        wizard = self.wizard()
+        today = fields.Date.today()
+        params = [
+            (product, qty, product.uom_po_id, today, self.partner)
+            for product, qty in [
+                (self.prod_1, 5),
+                (self.prod_1, 12),
+                (self.prod_2, 1),
+            ]
+        ]
+        sellers = wizard._select_sellers(params)
+        self.assertEqual([seller.price for seller in sellers], [5, 4, 10])
+        for (product, qty, uom, date, partner), seller in zip(params, sellers):
+            self.assertEqual(
+                seller,
+                product._select_seller(
+                    partner_id=partner, quantity=qty, date=date, uom_id=uom
+                ),
+            )
+
     def test_action_accept(self):
         """Open wizard when there are PO Lines and click on Accept"""
         po_line = self.env["purchase.order.line"].new(
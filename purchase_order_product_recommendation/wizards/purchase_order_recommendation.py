@@ -3,10 +3,13 @@
 # Copyright 2020 Tecnativa - Pedro M. Baeza
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.osv import expression
+from odoo.tools import float_compare
 
 
 class PurchaseOrderRecommendation(models.TransientModel):
@@ -139,14 +142,96 @@ class PurchaseOrderRecommendation(models.TransientModel):
             domain += [("categ_id", "in", self.product_category_ids.ids)]
         return domain
 
+    def _get_stat_kind(self, src, dst):
+        """Which daily statistics match the given location types, if any."""
+        return {
+            ("supplier", "internal"): "received",
+            ("internal", "customer"): "delivered",
+        }.get((src, dst), False)
+
+    def _read_group_move_lines(self, products, src, dst):
+        """Group the quantities done by product. Use the daily statistics
+        when they've been computed, reading from the move lines only the days
+        with activity since the last statistics update."""
+        move_line_obj = self.env["stock.move.line"]
+        kind = self._get_stat_kind(src, dst)
+        stat_obj = self.env["purchase.order.recommendation.stat"]
+        last_write_date = stat_obj._get_last_write_date()
+        domain = self._get_move_line_domain(products, src, dst)
+        # The statistics only answer the domain of this module, the move
+        # lines are read when third modules change it
+        if domain != PurchaseOrderRecommendation._get_move_line_domain(
+            self, products, src, dst
+        ):
+            kind = False
+        if not kind or not last_write_date:
+            return move_line_obj.read_group(
+                domain, ["product_id", "qty_done"], ["product_id"]
+            )
+        combine = datetime.combine
+        pending_days = {
+            line["date"].date()
+            for line in move_line_obj.search_read(
+                domain + [("write_date", ">=", last_write_date)], ["date"]
+            )
+        }
+        date_begin = self.env.context.get("period_date_begin", self.date_begin)
+        date_end = self.env.context.get("period_date_end", self.date_end)
+        stat_domain = [
+            ("product_id", "in", products.ids),
+            ("date", ">=", date_begin),
+            ("date", "<=", date_end),
+            ("times_%s" % kind, ">", 0),
+        ]
+        if self.warehouse_ids:
+            stat_domain += [("warehouse_id", "in", self.warehouse_ids.ids)]
+        if pending_days:
+            stat_domain += [("date", "not in", list(pending_days))]
+        totals = {}
+        for group in stat_obj.read_group(
+            stat_domain,
+            ["product_id", "qty_%s:sum" % kind, "times_%s:sum" % kind],
+            ["product_id"],
+        ):
+            totals[group["product_id"][0]] = [
+                group["product_id"],
+                group["times_%s" % kind],
+                group["qty_%s" % kind],
+            ]
+        if pending_days:
+            days_domain = expression.OR(
+                [
+                    [
+                        ("date", ">=", combine(day, datetime.min.time())),
+                        ("date", "<=", combine(day, datetime.max.time())),
+                    ]
+                    for day in pending_days
+                ]
+            )
+            for group in move_line_obj.read_group(
+                expression.AND([domain, days_domain]),
+                ["product_id", "qty_done"],
+                ["product_id"],
+            ):
+                total = totals.setdefault(
+                    group["product_id"][0], [group["product_id"], 0, 0.0]
+                )
+                total[1] += group["product_id_count"]
+                total[2] += group["qty_done"]
+        return [
+            {
+                "product_id": product,
+                "product_id_count": count,
+                "qty_done": qty,
+            }
+            for product, count, qty in totals.values()
+        ]
+
     def _find_move_line(self, src="internal", dst="customer"):
         """ "Returns a dictionary from the move lines in a range of dates
         from and to given location types"""
         products = self._get_products()
-        domain = self._get_move_line_domain(products, src, dst)
-        found_lines = self.env["stock.move.line"].read_group(
-            domain, ["product_id", "qty_done"], ["product_id"]
-        )
+        found_lines = self._read_group_move_lines(products, src, dst)
         # Manual ordering that circumvents ORM limitations
         found_lines = sorted(
             found_lines,
@@ -190,33 +275,146 @@ class PurchaseOrderRecommendation(models.TransientModel):
             "price_unit": seller.price,
         }
 
-    def _prepare_wizard_line(self, vals, order_line=False):
-        """Used to create the wizard line"""
+    def _get_products_availability(self, products):
+        """Compute on hand and forecasted quantities for all the given products
+        at once, constrained to the selected warehouses if any. The stock
+        quantities are computed in a few grouped queries for the whole
+        recordset, instead of one computation per product and warehouse.
+
+        :param products: product.product recordset
+        :return: dictionary {product_id: (qty_available, virtual_available)}
+        """
         self.ensure_one()
-        product_id = order_line and order_line.product_id or vals["product_id"]
+        if not products:
+            return {}
         if self.warehouse_ids:
-            units_available = sum(
-                product_id.with_context(warehouse=wh).qty_available
-                for wh in self.warehouse_ids.ids
-            )
-            units_virtual_available = sum(
-                product_id.with_context(warehouse=wh).virtual_available
-                for wh in self.warehouse_ids.ids
+            products = products.with_context(warehouse=self.warehouse_ids.ids)
+        context = products.env.context
+        quantities = products._compute_quantities_dict(
+            context.get("lot_id"),
+            context.get("owner_id"),
+            context.get("package_id"),
+            context.get("from_date"),
+            context.get("to_date"),
+        )
+        return {
+            product_id: (qty["qty_available"], qty["virtual_available"])
+            for product_id, qty in quantities.items()
+        }
+
+    def _get_sellers_index(self, products, partners=None):
+        """Load at once the supplier infos of the given products and partners
+        and index them by product template, in the same order
+        `product.product._select_seller` checks them.
+
+        :param products: product.product recordset
+        :param partners: optional res.partner recordset. All the partners are
+        loaded if not set.
+        :return: dictionary {product_tmpl_id: [product.supplierinfo, ...]}
+        """
+        domain = [
+            ("product_tmpl_id", "in", products.product_tmpl_id.ids),
+            ("partner_id.active", "=", True),
+            ("company_id", "in", [False, self.env.company.id]),
+        ]
+        if partners is not None:
+            domain += [("partner_id", "in", (partners | partners.parent_id).ids)]
+        supplierinfos = self.env["product.supplierinfo"].search(domain)
+        index = defaultdict(list)
+        for seller in supplierinfos.sorted(
+            lambda s: (s.sequence, -s.min_qty, s.price, s.id)
+        ):
+            index[seller.product_tmpl_id.id].append(seller)
+        return index
+
+    def _select_sellers(self, seller_params, index=None):
+        """Batch equivalent of `product.product._select_seller`.
+
+        :param seller_params: list of (product, quantity, uom, date, partner)
+        tuples.
+        :param index: optional dictionary as returned by `_get_sellers_index`
+        covering all the products and partners in `seller_params`.
+        :return: list with the selected product.supplierinfo for each tuple
+        """
+        supplierinfo_obj = self.env["product.supplierinfo"]
+        if index is None:
+            products = self.env["product.product"].union(
+                *[params[0] for params in seller_params]
             )
-        else:
-            units_available = product_id.qty_available
-            units_virtual_available = product_id.virtual_available
+            partners = None
+            if all(params[4] for params in seller_params):
+                partners = self.env["res.partner"].union(
+                    *[params[4] for params in seller_params]
+                )
+            index = self._get_sellers_index(products, partners)
+        precision = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        res = []
+        for product, quantity, uom, date, partner in seller_params:
+            selected = supplierinfo_obj
+            for seller in index.get(product.product_tmpl_id.id, []):
+                quantity_uom_seller = quantity
+                if quantity_uom_seller and uom and uom != seller.product_uom:
+                    quantity_uom_seller = uom._compute_quantity(
+                        quantity_uom_seller, seller.product_uom
+                    )
+                if seller.date_start and seller.date_start > date:
+                    continue
+                if seller.date_end and seller.date_end < date:
+                    continue
+                if partner and seller.partner_id not in [partner, partner.parent_id]:
+                    continue
+                if (
+                    quantity is not None
+                    and float_compare(
+                        quantity_uom_seller,
+                        seller.min_qty,
+                        precision_digits=precision,
+                    )
+                    == -1
+                ):
+                    continue
+                if seller.product_id and seller.product_id != product:
+                    continue
+                if not selected or selected.partner_id == seller.partner_id:
+                    selected |= seller
+            res.append(selected.sorted("price")[:1])
+        return res
+
+    def _prepare_wizard_line(
+        self, vals, order_line=False, availability=None, seller_index=None
+    ):
+        """Used to create the wizard line
+
+        :param availability: optional precomputed dictionary as returned by
+        `_get_products_availability`. If the product isn't found on it, its
+        quantities are computed on the fly.
+        :param seller_index: optional precomputed dictionary as returned by
+        `_get_sellers_index`.
+        """
+        self.ensure_one()
+        product_id = order_line and order_line.product_id or vals["product_id"]
+        if availability is None or product_id.id not in availability:
+            availability = self._get_products_availability(product_id)
+        units_available, units_virtual_available = availability[product_id.id]
         qty_to_order = abs(
             min(0, units_virtual_available - vals.get("qty_delivered", 0))
         )
         vals["is_modified"] = bool(qty_to_order)
         units_included = order_line and order_line.product_qty or qty_to_order
-        seller = product_id._select_seller(
-            partner_id=self.order_id.partner_id,
-            date=fields.Date.today(),
-            quantity=units_included,
-            uom_id=product_id.uom_po_id,
-        )
+        seller = self._select_sellers(
+            [
+                (
+                    product_id,
+                    units_included,
+                    product_id.uom_po_id,
+                    fields.Date.today(),
+                    self.order_id.partner_id,
+                )
+            ],
+            index=seller_index,
+        )[0]
         res = {
             "purchase_line_id": order_line and order_line.id,
             "product_id": product_id.id,
@@ -267,27 +465,46 @@ class PurchaseOrderRecommendation(models.TransientModel):
                 {k: v for k, v in line.items() if k not in found_dict[product].keys()}
             )
         RecomendationLine = self.env["purchase.order.recommendation.line"]
+        # Collect the lines to be prepared first, so stock availability can be
+        # computed in bulk for all the involved products
+        to_prepare = []
         existing_product_ids = []
         # Add products from purchase order lines
         for order_line in self.order_id.order_line:
             found_line = found_dict.get(order_line.product_id.id, {})
-            new_line = RecomendationLine.new(
-                self._prepare_wizard_line(found_line, order_line)
-            )
-            self.line_ids += new_line
+            to_prepare.append((found_line, order_line))
             existing_product_ids.append(order_line.product_id.id)
         # Add those recommendations too
         i = 0
         for product, line in found_dict.items():
             if product in existing_product_ids:
                 continue
-            new_line = RecomendationLine.new(self._prepare_wizard_line(line))
-            self.line_ids += new_line
+            to_prepare.append((line, False))
             # Limit number of results. It has to be done here, as we need to
             # populate all results first, for being able to select best matches
             i += 1
             if i == self.line_amount:
                 break
+        products = self.env["product.product"].browse(
+            list(
+                {
+                    (order_line and order_line.product_id or line["product_id"]).id
+                    for line, order_line in to_prepare
+                }
+            )
+        )
+        availability = self._get_products_availability(products)
+        seller_index = self._get_sellers_index(products, self.order_id.partner_id)
+        for line, order_line in to_prepare:
+            new_line = RecomendationLine.new(
+                self._prepare_wizard_line(
+                    line,
+                    order_line,
+                    availability=availability,
+                    seller_index=seller_index,
+                )
+            )
+            self.line_ids += new_line
         self.line_ids = self.line_ids.sorted(key=lambda x: x.product_id.name)
 
     def action_accept(self):
@@ -371,12 +588,18 @@ class PurchaseOrderRecommendationLine(models.TransientModel):
     @api.onchange("units_included")
     def _onchange_units_included(self):
         self.is_modified = bool(self.purchase_line_id or self.units_included)
-        self.price_unit = self.product_id._select_seller(
-            partner_id=self.partner_id,
-            date=fields.Date.today(),
-            quantity=self.units_included,
-            uom_id=self.product_id.uom_po_id,
-        ).price
+        seller = self.wizard_id._select_sellers(
+            [
+                (
+                    self.product_id,
+                    self.units_included,
+                    self.product_id.uom_po_id,
+                    fields.Date.today(),
+                    self.partner_id,
+                )
+            ]
+        )[0]
+        self.price_unit = seller.price
 
     def _prepare_update_po_line(self):
         """So we can extend PO update"""
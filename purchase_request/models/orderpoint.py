@@ -1,26 +1,94 @@
 # Copyright 2018-2019 ForgeFlow, S.L.
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
 
-from odoo import models
+from odoo import api, models
+
+QTY_IN_PROGRESS_CACHE = "purchase_request.orderpoint_qty_in_progress"
 
 
 class Orderpoint(models.Model):
     _inherit = "stock.warehouse.orderpoint"
 
+    def _procure_orderpoint_confirm(
+        self, use_new_cursor=False, company_id=None, raise_user_error=True
+    ):
+        """Keep the purchase request quantities in progress in cache during
+        the scheduler run, they are read again for every batch of
+        orderpoints."""
+        self._invalidate_purchase_request_qty_cache()
+        try:
+            return super(
+                Orderpoint, self.with_context(purchase_request_qty_cache=True)
+            )._procure_orderpoint_confirm(
+                use_new_cursor=use_new_cursor,
+                company_id=company_id,
+                raise_user_error=raise_user_error,
+            )
+        finally:
+            self._invalidate_purchase_request_qty_cache()
+
+    @api.model
+    def _invalidate_purchase_request_qty_cache(self):
+        self.env.cr.cache.pop(QTY_IN_PROGRESS_CACHE, None)
+
+    def _get_purchase_request_in_progress_domain(self):
+        return [
+            (
+                "request_id.state",
+                "in",
+                ("draft", "approved", "to_approve", "in_progress"),
+            ),
+            ("orderpoint_id", "in", self.ids),
+            ("purchase_state", "=", False),
+        ]
+
+    def _get_purchase_request_qty_in_progress(self):
+        """Quantities of the open purchase request lines of the orderpoints,
+        expressed in the orderpoint UoM.
+
+        The request lines are summed by orderpoint and UoM in the database,
+        so that the UoM conversion happens once per group.
+        """
+        use_cache = self.env.context.get("purchase_request_qty_cache")
+        if use_cache:
+            # Pending recomputations of the purchase state, after a purchase
+            # order is confirmed or cancelled, invalidate the cache
+            self.env["purchase.request.line"].flush_model(["purchase_state"])
+        cache = self.env.cr.cache.setdefault(QTY_IN_PROGRESS_CACHE, {})
+        orderpoints = self
+        if use_cache:
+            orderpoints = self.filtered(lambda op: op.id not in cache)
+        res = dict.fromkeys(orderpoints.ids, 0.0)
+        if orderpoints:
+            groups = self.env["purchase.request.line"].read_group(
+                orderpoints._get_purchase_request_in_progress_domain(),
+                ["product_qty:sum"],
+                ["orderpoint_id", "product_uom_id"],
+                lazy=False,
+            )
+            uoms = self.env["uom.uom"].browse(
+                {grp["product_uom_id"][0] for grp in groups if grp["product_uom_id"]}
+            )
+            uoms_by_id = {uom.id: uom for uom in uoms}
+            orderpoints_by_id = {op.id: op for op in orderpoints}
+            for group in groups:
+                orderpoint = orderpoints_by_id[group["orderpoint_id"][0]]
+                uom = uoms_by_id.get(
+                    group["product_uom_id"] and group["product_uom_id"][0]
+                )
+                qty = group["product_qty"]
+                if uom and uom != orderpoint.product_uom:
+                    qty = uom._compute_quantity(
+                        qty, orderpoint.product_uom, round=False
+                    )
+                res[orderpoint.id] += qty
+        if use_cache:
+            cache.update(res)
+            res = {orderpoint_id: cache[orderpoint_id] for orderpoint_id in self.ids}
+        return res
+
     def _quantity_in_progress(self):
         res = super(Orderpoint, self)._quantity_in_progress()
-        for prline in self.env["purchase.request.line"].search(
-            [
-                (
-                    "request_id.state",
-                    "in",
-                    ("draft", "approved", "to_approve", "in_progress"),
-                ),
-                ("orderpoint_id", "in", self.ids),
-                ("purchase_state", "=", False),
-            ]
-        ):
-            res[prline.orderpoint_id.id] += prline.product_uom_id._compute_quantity(
-                prline.product_qty, prline.orderpoint_id.product_uom, round=False
-            )
+        for orderpoint_id, qty in self._get_purchase_request_qty_in_progress().items():
+            res[orderpoint_id] += qty
         return res
@@ -257,6 +257,10 @@ class PurchaseRequest(models.Model):
         return requests
 
     def write(self, vals):
+        if "state" in vals:
+            self.env[
+                "stock.warehouse.orderpoint"
+            ]._invalidate_purchase_request_qty_cache()
         res = super(PurchaseRequest, self).write(vals)
         for request in self:
             if vals.get("assigned_to"):
@@ -94,6 +94,7 @@ class PurchaseRequestLine(models.Model):
         string="RFQ/PO Qty",
         digits="Product Unit of Measure",
         compute="_compute_purchased_qty",
+        store=True,
     )
     purchase_lines = fields.Many2many(
         comodel_name="purchase.order.line",
@@ -289,47 +290,162 @@ class PurchaseRequestLine(models.Model):
         """Actions to perform when uncancelling a purchase request line."""
         self.write({"cancelled": False})
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env["stock.warehouse.orderpoint"]._invalidate_purchase_request_qty_cache()
+        return super(PurchaseRequestLine, self).create(vals_list)
+
     def write(self, vals):
+        self.env["stock.warehouse.orderpoint"]._invalidate_purchase_request_qty_cache()
         res = super(PurchaseRequestLine, self).write(vals)
         if vals.get("cancelled"):
             requests = self.mapped("request_id")
             requests.check_auto_reject()
         return res
 
+    @api.depends(
+        "product_uom_id",
+        "purchase_lines",
+        "purchase_lines.state",
+        "purchase_lines.product_qty",
+        "purchase_lines.product_uom",
+    )
     def _compute_purchased_qty(self):
         for rec in self:
-            rec.purchased_qty = 0.0
-            for line in rec.purchase_lines.filtered(lambda x: x.state != "cancel"):
+            purchased_qty = 0.0
+            for line in rec.purchase_lines:
+                if line.state == "cancel":
+                    continue
                 if rec.product_uom_id and line.product_uom != rec.product_uom_id:
-                    rec.purchased_qty += line.product_uom._compute_quantity(
+                    purchased_qty += line.product_uom._compute_quantity(
                         line.product_qty, rec.product_uom_id
                     )
                 else:
-                    rec.purchased_qty += line.product_qty
+                    purchased_qty += line.product_qty
+            rec.purchased_qty = purchased_qty
+
+    @api.model
+    def _get_purchase_state(self, po_line_states):
+        """Purchase state of a request line from the set of the states of its
+        purchase order lines."""
+        if not po_line_states:
+            return False
+        if "done" in po_line_states:
+            return "done"
+        if po_line_states == {"cancel"}:
+            return "cancel"
+        for state in ("purchase", "to approve", "sent"):
+            if state in po_line_states:
+                return state
+        if po_line_states <= {"draft", "cancel"}:
+            return "draft"
+        return False
 
     @api.depends("purchase_lines.state", "purchase_lines.order_id.state")
     def _compute_purchase_state(self):
+        # The quantities in progress of the orderpoints depend on it, and
+        # it's recomputed without any write of the request lines
+        self.env["stock.warehouse.orderpoint"]._invalidate_purchase_request_qty_cache()
         for rec in self:
-            temp_purchase_state = False
-            if rec.purchase_lines:
-                if any(po_line.state == "done" for po_line in rec.purchase_lines):
-                    temp_purchase_state = "done"
-                elif all(po_line.state == "cancel" for po_line in rec.purchase_lines):
-                    temp_purchase_state = "cancel"
-                elif any(po_line.state == "purchase" for po_line in rec.purchase_lines):
-                    temp_purchase_state = "purchase"
-                elif any(
-                    po_line.state == "to approve" for po_line in rec.purchase_lines
-                ):
-                    temp_purchase_state = "to approve"
-                elif any(po_line.state == "sent" for po_line in rec.purchase_lines):
-                    temp_purchase_state = "sent"
-                elif all(
-                    po_line.state in ("draft", "cancel")
-                    for po_line in rec.purchase_lines
-                ):
-                    temp_purchase_state = "draft"
-            rec.purchase_state = temp_purchase_state
+            rec.purchase_state = self._get_purchase_state(
+                {po_line.state for po_line in rec.purchase_lines}
+            )
+
+    def _recompute_purchase_data_sql(self):
+        """Repair the stored purchased quantity and purchase state of the
+        request lines, or of all of them if called on an empty recordset.
+
+        The states are aggregated by SQL. The quantities are summed by SQL
+        per request line and PO line UoM, and converted in Python once per
+        group.
+        """
+        self.flush_model()
+        self.env["purchase.order.line"].flush_model(
+            ["state", "product_qty", "product_uom"]
+        )
+        where_clause = ""
+        params = {}
+        if self:
+            where_clause = "WHERE prl.id IN %(ids)s"
+            params["ids"] = tuple(self.ids)
+        self.env.cr.execute(
+            """
+            UPDATE purchase_request_line l
+            SET purchase_state = agg.purchase_state
+            FROM (
+                SELECT prl.id,
+                    CASE
+                        WHEN COUNT(pol.id) = 0 THEN NULL
+                        WHEN bool_or(pol.state = 'done') THEN 'done'
+                        WHEN bool_and(pol.state = 'cancel') THEN 'cancel'
+                        WHEN bool_or(pol.state = 'purchase') THEN 'purchase'
+                        WHEN bool_or(pol.state = 'to approve') THEN 'to approve'
+                        WHEN bool_or(pol.state = 'sent') THEN 'sent'
+                        WHEN bool_and(pol.state IN ('draft', 'cancel'))
+                            THEN 'draft'
+                    END AS purchase_state
+                FROM purchase_request_line prl
+                LEFT JOIN purchase_request_purchase_order_line_rel rel
+                    ON rel.purchase_request_line_id = prl.id
+                LEFT JOIN purchase_order_line pol
+                    ON pol.id = rel.purchase_order_line_id
+                {where_clause}
+                GROUP BY prl.id
+            ) agg
+            WHERE l.id = agg.id
+                AND l.purchase_state IS DISTINCT FROM agg.purchase_state
+            """.format(
+                where_clause=where_clause
+            ),
+            params,
+        )
+        self.env.cr.execute(
+            """
+            SELECT prl.id, prl.product_uom_id, pol.product_uom,
+                SUM(pol.product_qty)
+            FROM purchase_request_line prl
+            JOIN purchase_request_purchase_order_line_rel rel
+                ON rel.purchase_request_line_id = prl.id
+            JOIN purchase_order_line pol
+                ON pol.id = rel.purchase_order_line_id
+            {where_clause}
+            {and_or_where} pol.state != 'cancel'
+            GROUP BY prl.id, prl.product_uom_id, pol.product_uom
+            """.format(
+                where_clause=where_clause,
+                and_or_where="AND" if where_clause else "WHERE",
+            ),
+            params,
+        )
+        rows = self.env.cr.fetchall()
+        if self:
+            purchased_qtys = dict.fromkeys(self.ids, 0.0)
+        else:
+            self.env.cr.execute(
+                "SELECT id FROM purchase_request_line WHERE purchased_qty != 0.0"
+            )
+            purchased_qtys = dict.fromkeys([r[0] for r in self.env.cr.fetchall()], 0.0)
+        uom_obj = self.env["uom.uom"]
+        for line_id, line_uom_id, po_line_uom_id, qty in rows:
+            if line_uom_id and po_line_uom_id != line_uom_id:
+                qty = uom_obj.browse(po_line_uom_id)._compute_quantity(
+                    qty, uom_obj.browse(line_uom_id)
+                )
+            purchased_qtys[line_id] = purchased_qtys.get(line_id, 0.0) + qty
+        ids_by_qty = {}
+        for line_id, qty in purchased_qtys.items():
+            ids_by_qty.setdefault(qty, []).append(line_id)
+        for qty, line_ids in ids_by_qty.items():
+            self.env.cr.execute(
+                """
+                UPDATE purchase_request_line
+                SET purchased_qty = %s
+                WHERE id IN %s AND purchased_qty IS DISTINCT FROM %s
+                """,
+                (qty, tuple(line_ids), qty),
+            )
+        self.invalidate_model(["purchased_qty", "purchase_state"])
+        self.env["stock.warehouse.orderpoint"]._invalidate_purchase_request_qty_cache()
 
     @api.model
     def _get_supplier_min_qty(self, product, partner_id=False):
@@ -386,6 +502,7 @@ class PurchaseRequestLine(models.Model):
                         "if the purchase request is in draft state."
                     )
                 )
+        self.env["stock.warehouse.orderpoint"]._invalidate_purchase_request_qty_cache()
         return super(PurchaseRequestLine, self).unlink()
 
     def action_show_details(self):
@@ -8,7 +8,25 @@ class StockMoveLine(models.Model):
     _inherit = "stock.move.line"
 
     @api.model
-    def _purchase_request_confirm_done_message_content(self, message_data):
+    def _confirm_done_message_items(self, messages_data):
+        message = "<ul>"
+        for message_data in messages_data:
+            message += _(
+                "<li><b>%(product_name)s</b>: "
+                "Transferred quantity %(product_qty)s %(product_uom)s</li>"
+            ) % {
+                "product_name": message_data["product_name"],
+                "product_qty": message_data["product_qty"],
+                "product_uom": message_data["product_uom"],
+            }
+        message += "</ul>"
+        return message
+
+    @api.model
+    def _purchase_request_confirm_done_digest_content(self, messages_data):
+        """Message posted on a request for all its items received in a
+        picking."""
+        message_data = messages_data[0]
         title = _(
             "Receipt confirmation %(picking_name)s for your Request %(request_name)s"
         ) % {
@@ -24,45 +42,45 @@ class StockMoveLine(models.Model):
             "location_name": message_data["location_name"],
             "picking_name": message_data["picking_name"],
         }
-        message += "<ul>"
-        message += _(
-            "<li><b>%(product_name)s</b>: "
-            "Transferred quantity %(product_qty)s %(product_uom)s</li>"
-        ) % {
-            "product_name": message_data["product_name"],
-            "product_qty": message_data["product_qty"],
-            "product_uom": message_data["product_uom"],
-        }
-        message += "</ul>"
+        message += self._confirm_done_message_items(messages_data)
         return message
 
     @api.model
-    def _picking_confirm_done_message_content(self, message_data):
-        title = _("Receipt confirmation for Request %s") % (
-            message_data["request_name"]
-        )
-        message = "<h3>%s</h3>" % title
-        message += _(
-            "The following requested items from Purchase Request %(request_name)s "
-            "requested by %(requestor)s "
-            "have now been received in %(location_name)s:"
-        ) % {
-            "request_name": message_data["request_name"],
-            "requestor": message_data["requestor"],
-            "location_name": message_data["location_name"],
-        }
-        message += "<ul>"
-        message += _(
-            "<li><b>%(product_name)s</b>: "
-            "Transferred quantity %(product_qty)s %(product_uom)s</li>"
-        ) % {
-            "product_name": message_data["product_name"],
-            "product_qty": message_data["product_qty"],
-            "product_uom": message_data["product_uom"],
-        }
-        message += "</ul>"
+    def _purchase_request_confirm_done_message_content(self, message_data):
+        return self._purchase_request_confirm_done_digest_content([message_data])
+
+    @api.model
+    def _picking_confirm_done_digest_content(self, messages_data):
+        """Message posted on a picking for all the requested items it
+        received, with a section per request."""
+        messages_data_by_request = {}
+        for message_data in messages_data:
+            messages_data_by_request.setdefault(
+                message_data["request_name"], []
+            ).append(message_data)
+        message = ""
+        for request_messages_data in messages_data_by_request.values():
+            message_data = request_messages_data[0]
+            title = _("Receipt confirmation for Request %s") % (
+                message_data["request_name"]
+            )
+            message += "<h3>%s</h3>" % title
+            message += _(
+                "The following requested items from Purchase Request %(request_name)s "
+                "requested by %(requestor)s "
+                "have now been received in %(location_name)s:"
+            ) % {
+                "request_name": message_data["request_name"],
+                "requestor": message_data["requestor"],
+                "location_name": message_data["location_name"],
+            }
+            message += self._confirm_done_message_items(request_messages_data)
         return message
 
+    @api.model
+    def _picking_confirm_done_message_content(self, message_data):
+        return self._picking_confirm_done_digest_content([message_data])
+
     def _prepare_message_data(self, ml, request, allocated_qty):
         return {
             "request_name": request.name,
@@ -74,53 +92,85 @@ class StockMoveLine(models.Model):
             "requestor": request.requested_by.partner_id.name,
         }
 
+    def _post_allocation_messages(self, allocated):
+        """Post one digest message per request and picking on the request,
+        and one per picking on the picking.
+
+        :param allocated: list of (move line, request, allocated quantity)
+        """
+        request_messages_data = {}
+        picking_messages_data = {}
+        for ml, request, allocated_qty in allocated:
+            picking = ml.move_id.picking_id
+            message_data = self._prepare_message_data(ml, request, allocated_qty)
+            request_messages_data.setdefault((request, picking), []).append(
+                message_data
+            )
+            picking_messages_data.setdefault(picking, []).append(message_data)
+        subtype_id = self.env.ref("mail.mt_comment").id
+        for (request, _picking), messages_data in request_messages_data.items():
+            message = self._purchase_request_confirm_done_digest_content(messages_data)
+            if message:
+                request.message_post(body=message, subtype_id=subtype_id)
+        for picking, messages_data in picking_messages_data.items():
+            picking_message = self._picking_confirm_done_digest_content(messages_data)
+            if picking and picking_message:
+                picking.message_post(body=picking_message, subtype_id=subtype_id)
+
     def allocate(self):
-        for ml in self.filtered(
-            lambda m: m.exists() and m.move_id.purchase_request_allocation_ids
-        ):
+        """Allocate the done quantities to the purchase request allocations
+        of the moves.
 
-            # We do sudo because potentially the user that completes the move
-            #  may not have permissions for purchase.request.
+        The allocated quantities are computed in memory for all the move
+        lines, then written with one write per distinct quantity.
+        """
+        move_lines = self.filtered(
+            lambda m: m.exists() and m.move_id.purchase_request_allocation_ids
+        )
+        # We do sudo because potentially the user that completes the move
+        #  may not have permissions for purchase.request.
+        allocations = move_lines.move_id.purchase_request_allocation_ids.sudo()
+        open_qtys = {
+            allocation.id: allocation.open_product_qty for allocation in allocations
+        }
+        new_allocated_qtys = {}
+        allocated = []
+        for ml in move_lines:
             to_allocate_qty = ml.qty_done
             to_allocate_uom = ml.product_uom_id
             for allocation in ml.move_id.purchase_request_allocation_ids.sudo():
                 allocated_qty = 0.0
-                if allocation.open_product_qty and to_allocate_qty:
+                if open_qtys[allocation.id] and to_allocate_qty:
                     to_allocate_uom_qty = to_allocate_uom._compute_quantity(
                         to_allocate_qty, allocation.product_uom_id
                     )
-                    allocated_qty = min(
-                        allocation.open_product_qty, to_allocate_uom_qty
+                    allocated_qty = min(open_qtys[allocation.id], to_allocate_uom_qty)
+                    new_allocated_qtys[allocation.id] = (
+                        new_allocated_qtys.get(
+                            allocation.id, allocation.allocated_product_qty
+                        )
+                        + allocated_qty
                     )
-                    allocation.allocated_product_qty += allocated_qty
+                    open_qtys[allocation.id] -= allocated_qty
                     to_allocate_uom_qty -= allocated_qty
                     to_allocate_qty = allocation.product_uom_id._compute_quantity(
                         to_allocate_uom_qty, to_allocate_uom
                     )
-
-                request = allocation.purchase_request_line_id.request_id
                 if allocated_qty:
-                    message_data = self._prepare_message_data(
-                        ml, request, allocated_qty
-                    )
-                    message = self._purchase_request_confirm_done_message_content(
-                        message_data
-                    )
-                    if message:
-                        request.message_post(
-                            body=message, subtype_id=self.env.ref("mail.mt_comment").id
+                    allocated.append(
+                        (
+                            ml,
+                            allocation.purchase_request_line_id.request_id,
+                            allocated_qty,
                         )
-
-                    picking_message = self._picking_confirm_done_message_content(
-                        message_data
                     )
-                    if picking_message:
-                        ml.move_id.picking_id.message_post(
-                            body=picking_message,
-                            subtype_id=self.env.ref("mail.mt_comment").id,
-                        )
-
-                allocation._compute_open_product_qty()
+        allocation_ids_by_qty = {}
+        for allocation_id, qty in new_allocated_qtys.items():
+            allocation_ids_by_qty.setdefault(qty, []).append(allocation_id)
+        for qty, allocation_ids in allocation_ids_by_qty.items():
+            allocations.browse(allocation_ids).write({"allocated_product_qty": qty})
+        allocations._compute_open_product_qty()
+        self._post_allocation_messages(allocated)
 
     def _action_done(self):
         res = super(StockMoveLine, self)._action_done()
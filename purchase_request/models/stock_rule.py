@@ -2,6 +2,7 @@
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
 
 from odoo import api, fields, models
+from odoo.osv import expression
 
 
 class StockRule(models.Model):
@@ -81,10 +82,13 @@ class StockRule(models.Model):
 
     def _run_buy(self, procurements):
         indexes_to_pop = []
+        pr_procurements = []
         for i, procurement in enumerate(procurements):
             if self.is_create_purchase_request_allowed(procurement):
-                self.create_purchase_request(procurement)
+                pr_procurements.append(procurement)
                 indexes_to_pop.append(i)
+        if pr_procurements:
+            self.create_purchase_requests(pr_procurements)
         if indexes_to_pop:
             indexes_to_pop.reverse()
             for index in indexes_to_pop:
@@ -93,39 +97,89 @@ class StockRule(models.Model):
             return
         return super(StockRule, self)._run_buy(procurements)
 
+    @api.model
+    def _merge_purchase_request_origin(self, origin, procurement_origin):
+        """Return the purchase request origin once the procurement one is
+        added, if not already there."""
+        if (
+            not origin
+            or procurement_origin not in origin.split(", ")
+            and procurement_origin != "/"
+        ):
+            if origin:
+                if procurement_origin:
+                    return origin + ", " + procurement_origin
+            else:
+                return procurement_origin
+        return origin
+
     def create_purchase_request(self, procurement_group):
         """
         Create a purchase request containing procurement order product.
         """
-        procurement = procurement_group[0]
-        rule = procurement_group[1]
+        return self.create_purchase_requests([procurement_group])
+
+    def create_purchase_requests(self, procurement_groups):
+        """
+        Batch version of `create_purchase_request`. Procurements are grouped
+        by their purchase request domain, all the target requests are found
+        with one search and the missing ones created at once, origins are
+        merged with one write per request and all the request lines are
+        created together.
+
+        :param procurement_groups: list of (procurement, rule) tuples
+        """
         purchase_request_model = self.env["purchase.request"]
         purchase_request_line_model = self.env["purchase.request.line"]
-        cache = {}
-        pr = self.env["purchase.request"]
-        domain = rule._make_pr_get_domain(procurement.values)
-        if domain in cache:
-            pr = cache[domain]
-        elif domain:
-            pr = self.env["purchase.request"].search([dom for dom in domain])
-            pr = pr[0] if pr else False
-            cache[domain] = pr
-        if not pr:
-            request_data = rule._prepare_purchase_request(
-                procurement.origin, procurement.values
-            )
-            pr = purchase_request_model.create(request_data)
-            cache[domain] = pr
-        elif (
-            not pr.origin
-            or procurement.origin not in pr.origin.split(", ")
-            and procurement.origin != "/"
-        ):
-            if pr.origin:
-                if procurement.origin:
-                    pr.write({"origin": pr.origin + ", " + procurement.origin})
+        # Group the procurements by their purchase request domain, keeping
+        # the order. Procurements without domain always get a new request.
+        groups = {}
+        for i, (procurement, rule) in enumerate(procurement_groups):
+            domain = rule._make_pr_get_domain(procurement.values)
+            key = domain if domain else ("no_domain", i)
+            groups.setdefault(key, []).append((procurement, rule))
+        # Find the existing requests of all the domains with one search
+        domains = [list(key) for key in groups if key[0] != "no_domain"]
+        existing_prs = purchase_request_model
+        if domains:
+            existing_prs = purchase_request_model.search(expression.OR(domains))
+        prs = {}
+        to_create = []
+        for key, group in groups.items():
+            pr = purchase_request_model
+            if key[0] != "no_domain":
+                pr = existing_prs.filtered_domain(list(key))[:1]
+            if pr:
+                prs[key] = pr
             else:
-                pr.write({"origin": procurement.origin})
-        # Create Line
-        request_line_data = rule._prepare_purchase_request_line(pr, procurement)
-        purchase_request_line_model.create(request_line_data)
+                procurement, rule = group[0]
+                to_create.append(
+                    (
+                        key,
+                        rule._prepare_purchase_request(
+                            procurement.origin, procurement.values
+                        ),
+                    )
+                )
+        if to_create:
+            new_prs = purchase_request_model.create([vals for _k, vals in to_create])
+            for (key, _vals), pr in zip(to_create, new_prs):
+                prs[key] = pr
+        created_keys = {key for key, _vals in to_create}
+        request_lines_data = []
+        for key, group in groups.items():
+            pr = prs[key]
+            origin = pr.origin
+            for i, (procurement, rule) in enumerate(group):
+                # The origin of a new request already comes from its first
+                # procurement
+                if i or key not in created_keys:
+                    origin = self._merge_purchase_request_origin(
+                        origin, procurement.origin
+                    )
+                request_lines_data.append(
+                    rule._prepare_purchase_request_line(pr, procurement)
+                )
+            if origin != pr.origin:
+                pr.write({"origin": origin})
+        return purchase_request_line_model.create(request_lines_data)
@@ -309,6 +309,14 @@ class TestPurchaseRequestToRfq(common.TransactionCase):
         picking = purchase.picking_ids[0]
         picking.move_line_ids[0].write({"qty_done": 24.0})
         picking.button_validate()
+        # Both request lines are notified in a single message on the request
+        # and on the picking
+        for record in (purchase_request, picking):
+            messages = record.message_ids.filtered(
+                lambda m: "Receipt confirmation" in (m.body or "")
+            )
+            self.assertEqual(len(messages), 1)
+            self.assertEqual(messages.body.count("Transferred quantity"), 2)
         self.assertEqual(
             purchase_request_line1.purchase_request_allocation_ids[
                 0
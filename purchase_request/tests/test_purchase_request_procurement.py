@@ -168,3 +168,97 @@ class TestPurchaseRequestProcurement(common.TransactionCase):
         move4 = self._procurement_group_run("Split", self.product_1, 10)
         self.assertEqual(move4.created_purchase_request_line_id.request_id, pr)
         self.assertEqual(pr.origin, "Test Origin, Test, Split")
+
+    def test_procure_purchase_request_batch(self):
+        """Procurements run together are grouped in the same request"""
+        group_obj = self.env["procurement.group"]
+        group = group_obj.create({})
+        values = {
+            "group_id": group,
+            "company_id": self.env.company,
+            "date_planned": fields.Datetime.now(),
+            "route_ids": self.route_buy,
+            "warehouse_id": self.env.ref("stock.warehouse0"),
+        }
+        group_obj.run(
+            [
+                group_obj.Procurement(
+                    self.product_1,
+                    qty,
+                    self.product_1.uom_id,
+                    self.location,
+                    self.product_1.name,
+                    origin,
+                    self.env.company,
+                    values,
+                )
+                for qty, origin in [(1, "Origin A"), (2, "Origin B"), (3, "Origin A")]
+            ]
+        )
+        pr = self.pr_model.search([("group_id", "=", group.id)])
+        self.assertEqual(len(pr), 1)
+        self.assertEqual(pr.origin, "Origin A, Origin B")
+        self.assertEqual(sorted(pr.line_ids.mapped("product_qty")), [1, 2, 3])
+
+    def test_orderpoint_qty_in_progress(self):
+        """Request lines in progress are summed in the orderpoint UoM"""
+        orderpoint = self.env["stock.warehouse.orderpoint"].create(
+            {
+                "name": __name__,
+                "warehouse_id": self.env.ref("stock.warehouse0").id,
+                "location_id": self.location.id,
+                "product_id": self.product_1.id,
+                "product_min_qty": 1,
+                "product_max_qty": 5,
+            }
+        )
+        pr = self.pr_model.create(
+            {
+                "line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.product_1.id,
+                            "product_uom_id": uom.id,
+                            "product_qty": 1,
+                            "orderpoint_id": orderpoint.id,
+                        },
+                    )
+                    for uom in (
+                        self.product_1.uom_id,
+                        self.product_1.uom_id,
+                        self.env.ref("uom.product_uom_dozen"),
+                    )
+                ]
+            }
+        )
+        self.assertEqual(
+            orderpoint._get_purchase_request_qty_in_progress(), {orderpoint.id: 14.0}
+        )
+        # The quantities are cached during a scheduler run, until a request
+        # line is written
+        orderpoint = orderpoint.with_context(purchase_request_qty_cache=True)
+        self.assertEqual(orderpoint._quantity_in_progress()[orderpoint.id], 14.0)
+        pr.line_ids[0].product_qty = 3
+        self.assertEqual(orderpoint._quantity_in_progress()[orderpoint.id], 16.0)
+        # or their purchase state changes
+        self.env["purchase.order"].create(
+            {
+                "partner_id": self.supplier.id,
+                "order_line": [
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.product_1.id,
+                            "product_qty": 3,
+                            "purchase_request_lines": [(4, pr.line_ids[0].id)],
+                        },
+                    )
+                ],
+            }
+        )
+        self.assertEqual(orderpoint._quantity_in_progress()[orderpoint.id], 13.0)
+        pr.button_rejected()
+        self.assertEqual(orderpoint._quantity_in_progress()[orderpoint.id], 0.0)
@@ -412,3 +412,140 @@ class TestPurchaseRequestToRfq(common.TransactionCase):
         wiz_id.make_purchase_order()
         po_line = purchase_request["line_ids"][0].purchase_lines[0]
         self.assertEqual(po_line.analytic_distribution, analytic_distribution)
+
+    def test_purchase_request_to_purchase_rfq_merge_lines(self):
+        product = self.product_product
+        vals = {
+            "picking_type_id": self.env.ref("stock.picking_type_in").id,
+            "requested_by": SUPERUSER_ID,
+            "line_ids": [
+                (
+                    0,
+                    0,
+                    {
+                        "product_id": prod.id,
+                        "product_uom_id": self.env.ref("uom.product_uom_unit").id,
+                        "product_qty": qty,
+                    },
+                )
+                for prod, qty in [
+                    (product, 2.0),
+                    (self.env.ref("product.product_product_13"), 1.0),
+                    (product, 3.0),
+                    (product, 4.0),
+                ]
+            ],
+        }
+        purchase_request = self.purchase_request_obj.create(vals)
+        purchase_request.button_approved()
+        vals = {"supplier_id": self.env.ref("base.res_partner_12").id}
+        wiz_id = self.wiz.with_context(
+            active_model="purchase.request",
+            active_ids=purchase_request.ids,
+        ).create(vals)
+        wiz_id.make_purchase_order()
+        purchase = purchase_request.line_ids.purchase_lines.order_id
+        self.assertEqual(len(purchase), 1)
+        self.assertEqual(len(purchase.order_line), 2)
+        po_line = purchase.order_line.filtered(lambda l: l.product_id == product)
+        self.assertEqual(po_line.product_qty, 9.0)
+        self.assertEqual(
+            po_line.purchase_request_lines,
+            purchase_request.line_ids.filtered(lambda l: l.product_id == product),
+        )
+        self.assertEqual(
+            sorted(
+                po_line.purchase_request_lines.purchase_request_allocation_ids.mapped(
+                    "requested_product_uom_qty"
+                )
+            ),
+            [2.0, 3.0, 4.0],
+        )
+        self.assertEqual(purchase_request.state, "in_progress")
+
+    def test_purchase_request_to_purchase_rfq_seller_price(self):
+        vendor = self.env["res.partner"].create({"name": "Graduated vendor"})
+        self.env["product.supplierinfo"].create(
+            [
+                {
+                    "partner_id": vendor.id,
+                    "product_tmpl_id": self.product_product.product_tmpl_id.id,
+                    "min_qty": min_qty,
+                    "price": price,
+                }
+                for min_qty, price in [(1.0, 10.0), (5.0, 8.0)]
+            ]
+        )
+        vals = {
+            "picking_type_id": self.env.ref("stock.picking_type_in").id,
+            "requested_by": SUPERUSER_ID,
+            "line_ids": [
+                (
+                    0,
+                    0,
+                    {
+                        "product_id": self.product_product.id,
+                        "product_uom_id": self.env.ref("uom.product_uom_unit").id,
+                        "product_qty": qty,
+                    },
+                )
+                for qty in (2.0, 4.0)
+            ],
+        }
+        purchase_request = self.purchase_request_obj.create(vals)
+        purchase_request.button_approved()
+        wiz_id = self.wiz.with_context(
+            active_model="purchase.request",
+            active_ids=purchase_request.ids,
+        ).create({"supplier_id": vendor.id})
+        wiz_id.make_purchase_order()
+        po_line = purchase_request.line_ids.purchase_lines
+        self.assertEqual(len(po_line), 1)
+        self.assertEqual(po_line.product_qty, 6.0)
+        self.assertEqual(po_line.price_unit, 8.0)
+        self.assertEqual(po_line.name, "Product Product Test\nTest Description")
+
+    def test_purchase_request_line_purchase_data_repair(self):
+        vals = {
+            "picking_type_id": self.env.ref("stock.picking_type_in").id,
+            "requested_by": SUPERUSER_ID,
+            "line_ids": [
+                (
+                    0,
+                    0,
+                    {
+                        "product_id": self.product_product.id,
+                        "product_uom_id": self.env.ref("uom.product_uom_unit").id,
+                        "product_qty": 3.0,
+                    },
+                )
+            ],
+        }
+        purchase_request = self.purchase_request_obj.create(vals)
+        purchase_request.button_approved()
+        line = purchase_request.line_ids
+        wiz_id = self.wiz.with_context(
+            active_model="purchase.request.line", active_ids=line.ids
+        ).create({"supplier_id": self.env.ref("base.res_partner_12").id})
+        wiz_id.make_purchase_order()
+        domain = [("id", "=", line.id)]
+        self.assertEqual(line.purchased_qty, 3.0)
+        self.assertEqual(line.purchase_state, "draft")
+        self.assertEqual(
+            self.purchase_request_line_obj.search(
+                domain + [("purchased_qty", "=", 3.0), ("purchase_state", "=", "draft")]
+            ),
+            line,
+        )
+        line.purchase_lines.order_id.button_cancel()
+        self.assertEqual(line.purchased_qty, 0.0)
+        self.assertEqual(line.purchase_state, "cancel")
+        # Corrupt the stored values and repair them
+        self.env.cr.execute(
+            "UPDATE purchase_request_line "
+            "SET purchased_qty = 42.0, purchase_state = 'done' WHERE id = %s",
+            (line.id,),
+        )
+        self.purchase_request_line_obj._recompute_purchase_data_sql()
+        self.assertEqual(line.purchased_qty, 0.0)
+        self.assertEqual(line.purchase_state, "cancel")
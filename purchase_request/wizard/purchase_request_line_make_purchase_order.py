@@ -4,7 +4,7 @@ from datetime import datetime
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
-from odoo.tools import get_lang
+from odoo.tools import float_round, get_lang
 
 
 class PurchaseRequestLineMakePurchaseOrder(models.TransientModel):
@@ -139,13 +139,16 @@ class PurchaseRequestLineMakePurchaseOrder(models.TransientModel):
         }
         return data
 
-    def create_allocation(self, po_line, pr_line, new_qty, alloc_uom):
-        vals = {
+    def _prepare_allocation(self, po_line, pr_line, new_qty, alloc_uom):
+        return {
             "requested_product_uom_qty": new_qty,
             "product_uom_id": alloc_uom.id,
             "purchase_request_line_id": pr_line.id,
             "purchase_line_id": po_line.id,
         }
+
+    def create_allocation(self, po_line, pr_line, new_qty, alloc_uom):
+        vals = self._prepare_allocation(po_line, pr_line, new_qty, alloc_uom)
         return self.env["purchase.request.allocation"].create(vals)
 
     @api.model
@@ -216,66 +219,225 @@ class PurchaseRequestLineMakePurchaseOrder(models.TransientModel):
             order_line_data.append(("name", "=", item.name))
         return order_line_data
 
-    def make_purchase_order(self):
-        res = []
-        purchase_obj = self.env["purchase.order"]
-        po_line_obj = self.env["purchase.order.line"]
-        purchase = False
+    @api.model
+    def _get_order_line_key(self, name, product, uom, date_planned):
+        """Key of the new PO lines the next wizard items can be merged into,
+        mirrors `_get_order_line_search_domain`"""
+        return (
+            name,
+            product.id,
+            uom.id,
+            date_planned if self.sync_data_planned else False,
+        )
+
+    def _get_order_line_plans(self, order):
+        """Plans of the existing lines of the order.
+
+        Every line is described by a plan holding the state that the wizard
+        updates in memory before writing it back.
+        """
+        return {
+            po_line: {
+                "po_line": po_line,
+                "vals": {},
+                "product": po_line.product_id,
+                "product_uom": po_line.product_uom,
+                "product_qty": po_line.product_qty,
+                "analytic_distribution": po_line.analytic_distribution,
+                "request_lines": po_line.purchase_request_lines,
+                "move_dests": self.env["stock.move"],
+                "allocations": [],
+                "items": [],
+            }
+            for po_line in order.order_line
+        }
+
+    @api.model
+    def _get_plan_product_uom_qty(self, plan):
+        """Quantity of the planned PO line in the product UoM"""
+        return plan["product_uom"]._compute_quantity(
+            plan["product_qty"], plan["product"].uom_id
+        )
 
+    def _plan_purchase_order_lines(self, order):
+        """Decide in memory which PO line every wizard item is merged into or
+        creates, the allocations to create and the final PO line quantities.
+        """
+        existing_plans = self._get_order_line_plans(order)
+        index = {}
+        plans = []
+        precision = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        # Allocations of the request lines, existing and planned, used to
+        # compute the final PO line quantities
+        request_line_allocations = {}
+        min_qtys = {}
         for item in self.item_ids:
             line = item.line_id
+            vals = self._prepare_purchase_order_line(order, item)
+            date_planned = vals["date_planned"]
+            product_uom = self.env["uom.uom"].browse(vals["product_uom"])
+            name = self._get_purchase_line_name(order, item)
+            key = self._get_order_line_key(
+                name, item.product_id, product_uom, date_planned
+            )
+            # Allocation UoM has to be the same as PR line UoM
+            alloc_uom = line.product_uom_id
+            wizard_uom = item.product_uom_id
+            plan = False
+            if not item.keep_description and existing_plans:
+                po_lines = order.order_line.filtered_domain(
+                    self._get_order_line_search_domain(order, item)
+                )
+                if po_lines:
+                    plan = existing_plans[po_lines[0]]
+            if not item.keep_description and not plan:
+                plan = next(
+                    (
+                        candidate
+                        for candidate in index.get(key, [])
+                        if not line.analytic_distribution
+                        or candidate["analytic_distribution"]
+                        == line.analytic_distribution
+                    ),
+                    False,
+                )
+            new_pr_line = not plan
+            if plan:
+                plan["request_lines"] |= line
+                plan["move_dests"] |= line.move_dest_ids
+            else:
+                if item.keep_description:
+                    vals["name"] = name = item.name
+                plan = {
+                    "po_line": False,
+                    "vals": vals,
+                    "product": item.product_id,
+                    "product_uom": product_uom,
+                    "product_qty": float_round(
+                        vals["product_qty"], precision_digits=precision
+                    ),
+                    "analytic_distribution": vals["analytic_distribution"],
+                    "request_lines": line,
+                    "move_dests": line.move_dest_ids,
+                    "allocations": [],
+                    "items": [],
+                }
+                key = self._get_order_line_key(
+                    name, item.product_id, product_uom, date_planned
+                )
+                index.setdefault(key, []).append(plan)
+            po_line_product_uom_qty = plan["product_uom"]._compute_quantity(
+                self._get_plan_product_uom_qty(plan), alloc_uom
+            )
+            wizard_product_uom_qty = wizard_uom._compute_quantity(
+                item.product_qty, alloc_uom
+            )
+            all_qty = min(po_line_product_uom_qty, wizard_product_uom_qty)
+            if not plan["allocations"]:
+                plans.append(plan)
+            plan["allocations"].append((line, all_qty, alloc_uom))
+            plan["items"].append((item, new_pr_line))
+            for prl in plan["request_lines"]:
+                if prl.id not in request_line_allocations:
+                    request_line_allocations[prl.id] = [
+                        (alloc.product_uom_id, alloc.requested_product_uom_qty)
+                        for alloc in prl.purchase_request_allocation_ids
+                    ]
+            request_line_allocations[line.id].append((alloc_uom, all_qty))
+            # TODO: Check propagate_uom compatibility:
+            product = plan["product"]
+            purchase_uom = plan["product_uom"] or product.uom_po_id
+            if new_pr_line:
+                rl_qty = self._get_plan_product_uom_qty(plan)
+            else:
+                rl_qty = sum(
+                    uom._compute_quantity(qty, purchase_uom)
+                    for prl in plan["request_lines"]
+                    for uom, qty in request_line_allocations[prl.id]
+                )
+            if product not in min_qtys:
+                # Make sure we use the minimum quantity of the partner
+                # corresponding to the PO. This does not apply in case of
+                # dropshipping
+                min_qtys[product] = (
+                    0.0
+                    if order.dest_address_id
+                    else line._get_supplier_min_qty(product, order.partner_id)
+                )
+            # Quantity the PO line gets once `_post_process_po_line` ran for
+            # the item, the next allocations depend on it
+            plan["product_qty"] = float_round(
+                max(rl_qty, min_qtys[product]), precision_digits=precision
+            )
+        return plans
+
+    def _apply_purchase_order_line_plans(self, plans):
+        """Create the new PO lines at once, link the request lines to the
+        merged PO lines, create all the allocations and post-process every
+        PO line once."""
+        po_line_obj = self.env["purchase.order.line"]
+        new_plans = [plan for plan in plans if plan["vals"]]
+        vals_list = []
+        for plan in new_plans:
+            vals = dict(
+                plan["vals"],
+                product_qty=plan["product_qty"],
+                purchase_request_lines=[(4, prl.id) for prl in plan["request_lines"]],
+                move_dest_ids=[(4, move.id) for move in plan["move_dests"]],
+            )
+            vals_list.append(vals)
+        for plan, po_line in zip(new_plans, po_line_obj.create(vals_list)):
+            plan["po_line"] = po_line
+        for plan in plans:
+            if plan["vals"]:
+                continue
+            po_line = plan["po_line"]
+            request_lines = plan["request_lines"] - po_line.purchase_request_lines
+            po_line.write(
+                {
+                    "purchase_request_lines": [(4, prl.id) for prl in request_lines],
+                    "move_dest_ids": [(4, move.id) for move in plan["move_dests"]],
+                }
+            )
+        self.env["purchase.request.allocation"].create(
+            [
+                self._prepare_allocation(plan["po_line"], pr_line, qty, alloc_uom)
+                for plan in plans
+                for pr_line, qty, alloc_uom in plan["allocations"]
+            ]
+        )
+        # All the allocations exist, post-processing the last item merged in
+        # a PO line gives it its final quantity and scheduled date
+        for plan in plans:
+            item, new_pr_line = plan["items"][-1]
+            self._post_process_po_line(item, plan["po_line"], new_pr_line)
+
+    def make_purchase_order(self):
+        res = []
+        purchase = self.purchase_order_id
+        for item in self.item_ids:
             if item.product_qty <= 0.0:
                 raise UserError(_("Enter a positive quantity."))
-            if self.purchase_order_id:
-                purchase = self.purchase_order_id
+            # If Unit of Measure is not set, update from wizard.
+            if not item.line_id.product_uom_id:
+                item.line_id.product_uom_id = item.product_uom_id
+        if self.item_ids:
             if not purchase:
+                line = self.item_ids[0].line_id
                 po_data = self._prepare_purchase_order(
                     line.request_id.picking_type_id,
                     line.request_id.group_id,
                     line.company_id,
                     line.origin,
                 )
-                purchase = purchase_obj.create(po_data)
-
+                purchase = self.env["purchase.order"].create(po_data)
             # Look for any other PO line in the selected PO with same
             # product and UoM to sum quantities instead of creating a new
             # po line
-            domain = self._get_order_line_search_domain(purchase, item)
-            available_po_lines = po_line_obj.search(domain)
-            new_pr_line = True
-            # If Unit of Measure is not set, update from wizard.
-            if not line.product_uom_id:
-                line.product_uom_id = item.product_uom_id
-            # Allocation UoM has to be the same as PR line UoM
-            alloc_uom = line.product_uom_id
-            wizard_uom = item.product_uom_id
-            if available_po_lines and not item.keep_description:
-                new_pr_line = False
-                po_line = available_po_lines[0]
-                po_line.purchase_request_lines = [(4, line.id)]
-                po_line.move_dest_ids |= line.move_dest_ids
-                po_line_product_uom_qty = po_line.product_uom._compute_quantity(
-                    po_line.product_uom_qty, alloc_uom
-                )
-                wizard_product_uom_qty = wizard_uom._compute_quantity(
-                    item.product_qty, alloc_uom
-                )
-                all_qty = min(po_line_product_uom_qty, wizard_product_uom_qty)
-                self.create_allocation(po_line, line, all_qty, alloc_uom)
-            else:
-                po_line_data = self._prepare_purchase_order_line(purchase, item)
-                if item.keep_description:
-                    po_line_data["name"] = item.name
-                po_line = po_line_obj.create(po_line_data)
-                po_line_product_uom_qty = po_line.product_uom._compute_quantity(
-                    po_line.product_uom_qty, alloc_uom
-                )
-                wizard_product_uom_qty = wizard_uom._compute_quantity(
-                    item.product_qty, alloc_uom
-                )
-                all_qty = min(po_line_product_uom_qty, wizard_product_uom_qty)
-                self.create_allocation(po_line, line, all_qty, alloc_uom)
-            self._post_process_po_line(item, po_line, new_pr_line)
+            plans = self._plan_purchase_order_lines(purchase)
+            self._apply_purchase_order_line_plans(plans)
             res.append(purchase.id)
 
         purchase_requests = self.item_ids.mapped("request_id")
@@ -2,8 +2,6 @@
 # Copyright 2021 ForgeFlow, S.L. (https://www.forgeflow.com)
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
 
-from itertools import groupby
-
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 from odoo.osv import expression
@@ -22,7 +20,6 @@ class PurchaseOrderReturn(models.Model):
         for order in self:
             amount_untaxed = amount_tax = 0.0
             for line in order.order_line:
-                line._compute_amount()
                 amount_untaxed += line.price_subtotal
                 amount_tax += line.price_tax
             order.update(
@@ -42,26 +39,14 @@ class PurchaseOrderReturn(models.Model):
             if order.state not in ("purchase", "done"):
                 order.invoice_status = "no"
                 continue
-
-            if any(
-                not float_is_zero(line.qty_to_invoice, precision_digits=precision)
-                for line in order.order_line.filtered(
-                    lambda l: l.display_type == "product"
-                )
-            ):
-                order.invoice_status = "to invoice"
-            elif (
-                all(
-                    float_is_zero(line.qty_to_invoice, precision_digits=precision)
-                    for line in order.order_line.filtered(
-                        lambda l: l.display_type == "product"
-                    )
-                )
-                and order.invoice_ids
-            ):
-                order.invoice_status = "invoiced"
-            else:
-                order.invoice_status = "no"
+            invoice_status = "invoiced" if order.invoice_ids else "no"
+            for line in order.order_line:
+                if line.display_type == "product" and not float_is_zero(
+                    line.qty_to_invoice, precision_digits=precision
+                ):
+                    invoice_status = "to invoice"
+                    break
+            order.invoice_status = invoice_status
 
     @api.depends("order_line.invoice_lines.move_id")
     def _compute_invoice(self):
@@ -555,11 +540,47 @@ class PurchaseOrderReturn(models.Model):
             "purchase_return.report_purchase_return_order"
         ).report_action(self)
 
+    def _get_refund_journal(self, cache=None):
+        """Default refund journal of the order company, looked up once per
+        company when a cache dict is given."""
+        self.ensure_one()
+        cache = {} if cache is None else cache
+        key = ("journal", self.company_id.id)
+        if key not in cache:
+            journal = (
+                self.env["account.move"]
+                .with_company(self.company_id)
+                .with_context(default_move_type="in_refund")
+                ._search_default_journal()
+            )
+            if not journal:
+                raise UserError(
+                    _(
+                        "Please define an accounting purchase journal for "
+                        "the company %(scn)s (%(sci)s)."
+                    )
+                    % {"scn": self.company_id.name, "sci": self.company_id.id}
+                )
+            cache[key] = journal
+        return cache[key]
+
+    def _get_refund_fiscal_position(self, cache=None):
+        self.ensure_one()
+        if self.fiscal_position_id:
+            return self.fiscal_position_id
+        cache = {} if cache is None else cache
+        key = ("fiscal_position", self.company_id.id, self.partner_id.id)
+        if key not in cache:
+            cache[key] = self.fiscal_position_id._get_fiscal_position(self.partner_id)
+        return cache[key]
+
     def action_create_refund(self):
         """Create the refund associated to the PO."""
         precision = self.env["decimal.precision"].precision_get(
             "Product Unit of Measure"
         )
+        # Journals and fiscal positions are resolved once for all the orders
+        cache = {}
 
         # 1) Prepare invoice vals and clean-up the section lines
         invoice_vals_list = []
@@ -570,7 +591,8 @@ class PurchaseOrderReturn(models.Model):
             order = order.with_company(order.company_id)
             pending_section = None
             # Invoice values.
-            invoice_vals = order._prepare_invoice()
+            invoice_vals = order._prepare_invoice(cache=cache)
+            invoice_vals["journal_id"] = order._get_refund_journal(cache=cache).id
             # Invoice line values (keep only necessary sections).
             for line in order.order_line:
                 if line.display_type == "line_section":
@@ -597,15 +619,18 @@ class PurchaseOrderReturn(models.Model):
             )
 
         # 2) group by (company_id, partner_id, currency_id) for batch creation
+        grouped_invoice_vals = {}
+        for invoice_vals in invoice_vals_list:
+            grouped_invoice_vals.setdefault(
+                (
+                    invoice_vals.get("company_id"),
+                    invoice_vals.get("partner_id"),
+                    invoice_vals.get("currency_id"),
+                ),
+                [],
+            ).append(invoice_vals)
         new_invoice_vals_list = []
-        for _grouping_keys, invoices in groupby(
-            invoice_vals_list,
-            key=lambda x: (
-                x.get("company_id"),
-                x.get("partner_id"),
-                x.get("currency_id"),
-            ),
-        ):
+        for invoices in grouped_invoice_vals.values():
             origins = set()
             payment_refs = set()
             refs = set()
@@ -632,34 +657,28 @@ class PurchaseOrderReturn(models.Model):
             new_invoice_vals_list.append(ref_invoice_vals)
         invoice_vals_list = new_invoice_vals_list
 
-        # 3) Create invoices.
+        # 3) Create invoices, at once for every company.
         moves = self.env["account.move"]
         AccountMove = self.env["account.move"].with_context(
             default_move_type="in_refund"
         )
+        vals_list_by_company = {}
         for vals in invoice_vals_list:
-            moves |= AccountMove.with_company(vals["company_id"]).create(vals)
+            vals_list_by_company.setdefault(vals["company_id"], []).append(vals)
+        for company_id, vals_list in vals_list_by_company.items():
+            moves |= AccountMove.with_company(company_id).create(vals_list)
 
         return self.action_view_invoice(moves)
 
-    def _prepare_invoice(self):
-        """Prepare the dict of values to create the new invoice for a purchase order."""
+    def _prepare_invoice(self, cache=None):
+        """Prepare the dict of values to create the new invoice for a purchase order.
+
+        :param cache: optional dict shared between orders to look up journals
+                      and fiscal positions once
+        """
         self.ensure_one()
         move_type = "in_refund"
-        journal = (
-            self.env["account.move"]
-            .with_context(default_move_type=move_type)
-            ._search_default_journal()
-        )
-        if not journal:
-            raise UserError(
-                _(
-                    "Please define an accounting purchase journal for "
-                    "the company %(scn)s (%(sci)s)."
-                )
-                % {"scn": self.company_id.name, "sci": self.company_id.id}
-            )
-
+        self._get_refund_journal(cache=cache)
         partner_invoice_id = self.partner_id.address_get(["invoice"])["invoice"]
         invoice_vals = {
             "ref": self.partner_ref or self.name,
@@ -668,10 +687,7 @@ class PurchaseOrderReturn(models.Model):
             "currency_id": self.currency_id.id,
             "invoice_user_id": self.user_id and self.user_id.id,
             "partner_id": partner_invoice_id,
-            "fiscal_position_id": (
-                self.fiscal_position_id
-                or self.fiscal_position_id._get_fiscal_position(self.partner_id)
-            ).id,
+            "fiscal_position_id": self._get_refund_fiscal_position(cache=cache).id,
             "payment_reference": "",
             "partner_bank_id": self.partner_id.bank_ids[:1].id,
             "invoice_origin": self.name,
@@ -2,6 +2,7 @@
 # Copyright 2021 ForgeFlow, S.L. (https://www.forgeflow.com)
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
 
+from collections import defaultdict
 from datetime import datetime, time
 
 from dateutil.relativedelta import relativedelta
@@ -13,6 +14,16 @@ from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 from odoo.tools.misc import get_lang
 
 
+ONCHANGE_FIELDS = [
+    "name",
+    "price_unit",
+    "product_qty",
+    "product_uom",
+    "taxes_id",
+    "date_planned",
+]
+
+
 class PurchaseReturnOrderLine(models.Model):
     _name = "purchase.return.order.line"
     _description = "Purchase Return Order Line"
@@ -139,26 +150,54 @@ class PurchaseReturnOrderLine(models.Model):
         ),
     ]
 
-    @api.depends("product_qty", "price_unit", "taxes_id")
-    def _compute_amount(self):
+    def _get_amount_groups(self):
+        """Group the lines by taxes, currency and price-included flag.
+
+        :return: {(taxes, currency, price included): [(line, compute_all
+                 values)]}
+        """
+        groups = defaultdict(list)
         for line in self:
             vals = line._prepare_compute_all_values()
-            taxes = line.taxes_id.compute_all(
-                vals["price_unit"],
-                vals["currency_id"],
-                vals["product_qty"],
-                vals["product"],
-                vals["partner"],
-            )
-            line.update(
-                {
-                    "price_tax": sum(
-                        t.get("amount", 0.0) for t in taxes.get("taxes", [])
-                    ),
-                    "price_total": taxes["total_included"],
-                    "price_subtotal": taxes["total_excluded"],
-                }
+            taxes = line.taxes_id
+            key = (taxes, vals["currency_id"], any(taxes.mapped("price_include")))
+            groups[key].append((line, vals))
+        return groups
+
+    @api.depends("product_qty", "price_unit", "taxes_id")
+    def _compute_amount(self):
+        for (taxes, currency, _price_include), group in (
+            self._get_amount_groups().items()
+        ):
+            # Inside a group, the amounts only depend on the price and the
+            # quantity, unless a tax is computed by python code which may
+            # use the product and the partner
+            by_product = any(
+                tax.amount_type == "code" for tax in taxes.flatten_taxes_hierarchy()
             )
+            computed_taxes = {}
+            for line, vals in group:
+                key = (vals["price_unit"], vals["product_qty"])
+                if by_product:
+                    key += (vals["product"].id, vals["partner"].id)
+                if key not in computed_taxes:
+                    computed_taxes[key] = taxes.compute_all(
+                        vals["price_unit"],
+                        currency,
+                        vals["product_qty"],
+                        vals["product"],
+                        vals["partner"],
+                    )
+                amounts = computed_taxes[key]
+                line.update(
+                    {
+                        "price_tax": sum(
+                            t.get("amount", 0.0) for t in amounts.get("taxes", [])
+                        ),
+                        "price_total": amounts["total_included"],
+                        "price_subtotal": amounts["total_excluded"],
+                    }
+                )
 
     def _prepare_compute_all_values(self):
         # Hook method to returns the different argument values for the
@@ -175,20 +214,58 @@ class PurchaseReturnOrderLine(models.Model):
             "partner": self.order_id.partner_id,
         }
 
+    @api.model
+    def _get_product_taxes(self, product, order):
+        """Vendor taxes of the product mapped by the order fiscal position"""
+        order = order.with_company(order.company_id)
+        fpos = order.fiscal_position_id
+        if not fpos:
+            fpos = fpos._get_fiscal_position(order.partner_id)
+        # filter taxes by company
+        taxes = product.with_company(order.company_id).supplier_taxes_id.filtered(
+            lambda r: r.company_id == order.env.company
+        )
+        return fpos.map_tax(taxes)
+
     def _compute_tax_id(self):
         for line in self:
-            line = line.with_company(line.company_id)
-            fpos = (
-                line.order_id.fiscal_position_id
-                or line.order_id.fiscal_position_id._get_fiscal_position(
-                    line.order_id.partner_id
+            line.taxes_id = self._get_product_taxes(line.product_id, line.order_id)
+
+    def _get_invoiced_quantities(self):
+        """Invoiced quantities of the lines, summed by SQL per line, bill
+        line UoM and bill type.
+
+        :return: {line id: [(uom, qty)]} where refunded quantities are
+                 positive and billed quantities negative
+        """
+        line_ids = [line_id for line_id in self._origin.ids if line_id]
+        if not line_ids:
+            return {}
+        self.env["account.move.line"].flush_model(
+            ["purchase_return_line_id", "move_id", "quantity", "product_uom_id"]
+        )
+        self.env["account.move"].flush_model(["state", "move_type"])
+        self.env.cr.execute(
+            """
+            SELECT aml.purchase_return_line_id, aml.product_uom_id,
+                SUM(
+                    CASE WHEN am.move_type = 'in_invoice'
+                    THEN -aml.quantity ELSE aml.quantity END
                 )
-            )
-            # filter taxes by company
-            taxes = line.product_id.supplier_taxes_id.filtered(
-                lambda r: r.company_id == line.env.company
-            )
-            line.taxes_id = fpos.map_tax(taxes)
+            FROM account_move_line aml
+            JOIN account_move am ON am.id = aml.move_id
+            WHERE aml.purchase_return_line_id IN %s
+                AND am.state != 'cancel'
+                AND am.move_type IN ('in_invoice', 'in_refund')
+            GROUP BY aml.purchase_return_line_id, aml.product_uom_id
+            """,
+            (tuple(line_ids),),
+        )
+        uom_obj = self.env["uom.uom"]
+        res = {}
+        for line_id, uom_id, qty in self.env.cr.fetchall():
+            res.setdefault(line_id, []).append((uom_obj.browse(uom_id), qty))
+        return res
 
     @api.depends(
         "invoice_lines.move_id.state",
@@ -198,19 +275,12 @@ class PurchaseReturnOrderLine(models.Model):
         "order_id.state",
     )
     def _compute_qty_invoiced(self):
+        invoiced_quantities = self._get_invoiced_quantities()
         for line in self:
             # compute qty_invoiced
             qty = 0.0
-            for inv_line in line.invoice_lines:
-                if inv_line.move_id.state not in ["cancel"]:
-                    if inv_line.move_id.move_type == "in_invoice":
-                        qty -= inv_line.product_uom_id._compute_quantity(
-                            inv_line.quantity, line.product_uom
-                        )
-                    elif inv_line.move_id.move_type == "in_refund":
-                        qty += inv_line.product_uom_id._compute_quantity(
-                            inv_line.quantity, line.product_uom
-                        )
+            for uom, uom_qty in invoiced_quantities.get(line._origin.id, []):
+                qty += uom._compute_quantity(uom_qty, line.product_uom)
             line.qty_invoiced = qty
 
             # compute qty_to_invoice
@@ -440,60 +510,43 @@ class PurchaseReturnOrderLine(models.Model):
             return {"warning": warning}
         return {}
 
-    @api.onchange("product_qty", "product_uom")
-    def _onchange_quantity(self):
-        if not self.product_id:
-            return
-        params = {"order_id": self.order_id}
-        seller = self.product_id._select_seller(
-            partner_id=self.partner_id,
-            quantity=self.product_qty,
-            date=self.order_id.date_order and self.order_id.date_order.date(),
-            uom_id=self.product_uom,
-            params=params,
-        )
-
-        if seller or not self.date_planned:
-            self.date_planned = self._get_date_planned(seller).strftime(
-                DEFAULT_SERVER_DATETIME_FORMAT
-            )
-
+    @api.model
+    def _get_seller_price_unit(self, product, seller, order, product_uom, taxes):
+        """Unit price of the product in the line UoM and the order currency,
+        from the seller or from the product cost when there is none."""
+        company = order.company_id
         # If not seller, use the standard price. It needs a proper currency conversion.
         if not seller:
             price_unit = self.env["account.tax"]._fix_tax_included_price_company(
-                self.product_id.uom_id._compute_price(
-                    self.product_id.standard_price, self.product_id.uom_po_id
+                product.uom_id._compute_price(
+                    product.standard_price, product.uom_po_id
                 ),
-                self.product_id.supplier_taxes_id,
-                self.taxes_id,
-                self.company_id,
+                product.supplier_taxes_id,
+                taxes,
+                company,
             )
             if (
                 price_unit
-                and self.order_id.currency_id
-                and self.order_id.company_id.currency_id != self.order_id.currency_id
+                and order.currency_id
+                and company.currency_id != order.currency_id
             ):
-                price_unit = self.order_id.company_id.currency_id._convert(
+                price_unit = company.currency_id._convert(
                     price_unit,
-                    self.order_id.currency_id,
-                    self.order_id.company_id,
-                    self.date_order or fields.Date.today(),
-                )
-
-            if self.product_uom:
-                price_unit = self.product_id.uom_id._compute_price(
-                    price_unit, self.product_uom
+                    order.currency_id,
+                    company,
+                    order.date_order or fields.Date.today(),
                 )
 
-            self.price_unit = price_unit
-            return
+            if product_uom:
+                price_unit = product.uom_id._compute_price(price_unit, product_uom)
+            return price_unit
 
         price_unit = (
             self.env["account.tax"]._fix_tax_included_price_company(
                 seller.price,
-                self.product_id.supplier_taxes_id,
-                self.taxes_id,
-                self.company_id,
+                product.supplier_taxes_id,
+                taxes,
+                company,
             )
             if seller
             else 0.0
@@ -501,20 +554,41 @@ class PurchaseReturnOrderLine(models.Model):
         if (
             price_unit
             and seller
-            and self.order_id.currency_id
-            and seller.currency_id != self.order_id.currency_id
+            and order.currency_id
+            and seller.currency_id != order.currency_id
         ):
             price_unit = seller.currency_id._convert(
                 price_unit,
-                self.order_id.currency_id,
-                self.order_id.company_id,
-                self.date_order or fields.Date.today(),
+                order.currency_id,
+                order.company_id,
+                order.date_order or fields.Date.today(),
             )
 
-        if seller and self.product_uom and seller.product_uom != self.product_uom:
-            price_unit = seller.product_uom._compute_price(price_unit, self.product_uom)
+        if seller and product_uom and seller.product_uom != product_uom:
+            price_unit = seller.product_uom._compute_price(price_unit, product_uom)
+        return price_unit
 
-        self.price_unit = price_unit
+    @api.onchange("product_qty", "product_uom")
+    def _onchange_quantity(self):
+        if not self.product_id:
+            return
+        params = {"order_id": self.order_id}
+        seller = self.product_id._select_seller(
+            partner_id=self.partner_id,
+            quantity=self.product_qty,
+            date=self.order_id.date_order and self.order_id.date_order.date(),
+            uom_id=self.product_uom,
+            params=params,
+        )
+
+        if seller or not self.date_planned:
+            self.date_planned = self._get_date_planned(seller).strftime(
+                DEFAULT_SERVER_DATETIME_FORMAT
+            )
+
+        self.price_unit = self._get_seller_price_unit(
+            self.product_id, seller, self.order_id, self.product_uom, self.taxes_id
+        )
 
     @api.depends("product_uom", "product_qty", "product_id.uom_id")
     def _compute_product_uom_qty(self):
@@ -538,26 +612,126 @@ class PurchaseReturnOrderLine(models.Model):
     def _prepare_add_missing_fields(self, values):
         """Deduce missing required fields from the onchange"""
         res = {}
-        onchange_fields = [
-            "name",
-            "price_unit",
-            "product_qty",
-            "product_uom",
-            "taxes_id",
-            "date_planned",
-        ]
         if (
             values.get("order_id")
             and values.get("product_id")
-            and any(f not in values for f in onchange_fields)
+            and any(f not in values for f in ONCHANGE_FIELDS)
         ):
             line = self.new(values)
             line.onchange_product_id()
-            for field in onchange_fields:
+            for field in ONCHANGE_FIELDS:
                 if field not in values:
                     res[field] = line._fields[field].convert_to_write(line[field], line)
         return res
 
+    @api.model
+    def _get_product_onchange_values(self, order, product, cache):
+        """Values the product onchange gives to a new line of the order,
+        computed without onchange simulation. The descriptions, taxes and
+        sellers are shared through the cache between the orders with the
+        same vendor and company."""
+        partner = order.partner_id
+        line = self.new({"order_id": order.id})
+        product_uom = product.uom_po_id or product.uom_id
+        key = ("name", product.id, partner.id, order.company_id.id)
+        if key not in cache:
+            product_lang = product.with_context(
+                lang=get_lang(self.env, partner.lang).code,
+                partner_id=partner.id,
+                company_id=order.company_id.id,
+            )
+            cache[key] = line._get_product_purchase_description(product_lang)
+        name = cache[key]
+        # Without fiscal position on the order, the taxes are mapped by the
+        # fiscal position of the vendor
+        key = (
+            "taxes",
+            product.id,
+            order.company_id.id,
+            order.fiscal_position_id.id,
+            not order.fiscal_position_id and partner.id,
+        )
+        if key not in cache:
+            cache[key] = self._get_product_taxes(product, order)
+        taxes = cache[key]
+        date = order.date_order and order.date_order.date()
+        key = ("seller", product.id, partner.id, date, order.company_id.id)
+        if key not in cache:
+            # The onchange resets the quantity before looking for the seller
+            cache[key] = product._select_seller(
+                partner_id=partner,
+                quantity=0.0,
+                date=date,
+                uom_id=product_uom,
+                params={"order_id": order},
+            )
+        seller = cache[key]
+        return {
+            "name": name,
+            "price_unit": self._get_seller_price_unit(
+                product, seller, order, product_uom, taxes
+            ),
+            "product_qty": 0.0,
+            "product_uom": product_uom.id,
+            "taxes_id": [(6, 0, taxes.ids)],
+            "date_planned": line._get_date_planned(seller),
+        }
+
+    @api.model
+    def _prepare_add_missing_fields_multi(self, vals_list):
+        """Deduce the missing required fields of many lines at once.
+
+        The values are computed once per order and product, without
+        simulating the onchange of every line.
+        """
+        orders = self.env["purchase.return.order"].browse(
+            {values["order_id"] for values in vals_list if values.get("order_id")}
+        )
+        products = self.env["product.product"].browse(
+            {values["product_id"] for values in vals_list if values.get("product_id")}
+        )
+        orders_by_id = {order.id: order for order in orders}
+        products_by_id = {product.id: product for product in products}
+        cache = {}
+        onchange_values = {}
+        res_list = []
+        for values in vals_list:
+            res = {}
+            res_list.append(res)
+            missing_fields = [f for f in ONCHANGE_FIELDS if f not in values]
+            if not (
+                values.get("order_id") and values.get("product_id") and missing_fields
+            ):
+                continue
+            key = (values["order_id"], values["product_id"])
+            if key not in onchange_values:
+                onchange_values[key] = self._get_product_onchange_values(
+                    orders_by_id[values["order_id"]],
+                    products_by_id[values["product_id"]],
+                    cache,
+                )
+            for field in missing_fields:
+                res[field] = onchange_values[key][field]
+        return res_list
+
+    @api.model
+    @api.returns("self")
+    def import_lines(self, vals_list):
+        """Create lines in bulk, from an external system for instance. The
+        lines are product lines unless another display_type is given.
+
+        The missing fields are deduced with _prepare_add_missing_fields_multi,
+        so that create does not simulate the onchange of every line.
+        """
+        vals_list = [
+            dict({"display_type": "product"}, **values) for values in vals_list
+        ]
+        for values, res in zip(
+            vals_list, self._prepare_add_missing_fields_multi(vals_list)
+        ):
+            values.update(res)
+        return self.create(vals_list)
+
     def _convert_to_middle_of_day(self, date):
         """Return a datetime which is the noon of the input date(time) according
         to order user's time zone, convert to UTC time.
@@ -3,3 +3,4 @@
 
 from . import test_purchase_return_order
 from . import test_purchase_return_order_line
+from . import test_purchase_return_order_line_benchmark
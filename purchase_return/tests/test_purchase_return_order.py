@@ -90,6 +90,14 @@ class TestPurchaseReturnOrder(AccountTestInvoicingCommon):
             self.assertEqual(line.qty_invoiced, 0.0)
         purchase_return_order.action_create_refund()
         self.assertEqual(purchase_return_order.invoice_status, "invoiced")
+        line = purchase_return_order.order_line
+        self.assertEqual(line.qty_invoiced, 10.0)
+        self.assertEqual(line.qty_to_invoice, 0.0)
+        # Cancelled refunds are not counted
+        line.invoice_lines.move_id.button_cancel()
+        self.assertEqual(line.qty_invoiced, 0.0)
+        self.assertEqual(line.qty_to_invoice, 10.0)
+        self.assertEqual(purchase_return_order.invoice_status, "to invoice")
 
     # Test a product ordered without refund only option
     def test_02(self):
@@ -335,3 +343,43 @@ class TestPurchaseReturnOrder(AccountTestInvoicingCommon):
         purchase_return_order.date_planned = testDate
         for line in purchase_return_order:
             self.assertEqual(line.date_planned, testDate)
+
+    # Test that returns of the same vendor are refunded together
+    def test_08(self):
+        purchase_return_orders = (
+            self.env["purchase.return.order"]
+            .with_context(tracking_disable=True)
+            .create([{"partner_id": self.partner_a.id} for _i in range(3)])
+        )
+        PurchaseReturnOrderLine = self.env["purchase.return.order.line"].with_context(
+            tracking_disable=True
+        )
+        PurchaseReturnOrderLine.create(
+            [
+                {
+                    "name": self.product_order.name,
+                    "product_id": self.product_order.id,
+                    "product_qty": 10.0,
+                    "product_uom": self.product_order.uom_id.id,
+                    "price_unit": self.product_order.list_price,
+                    "order_id": purchase_return_order.id,
+                    "refund_only": True,
+                    "taxes_id": False,
+                    "display_type": "product",
+                }
+                for purchase_return_order in purchase_return_orders
+            ]
+        )
+        purchase_return_orders.button_confirm()
+        purchase_return_orders.action_create_refund()
+        refund = purchase_return_orders.invoice_ids
+        self.assertEqual(len(refund), 1)
+        self.assertEqual(refund.move_type, "in_refund")
+        self.assertEqual(len(refund.invoice_line_ids), 3)
+        self.assertEqual(
+            refund.invoice_line_ids.account_id,
+            self.product_order.product_tmpl_id.get_product_accounts()["expense"],
+        )
+        self.assertEqual(
+            set(purchase_return_orders.mapped("invoice_status")), {"invoiced"}
+        )
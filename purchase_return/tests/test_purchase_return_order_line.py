@@ -124,3 +124,180 @@ class TestPurchaseReturnOrderLine(AccountTestInvoicingCommon):
         self.assertEqual(po_line.product_id, self.service_order)
         self.assertEqual(po_line.product_uom, self.service_order.uom_id)
         self.assertEqual(po_line.order_id, purchase_return_order)
+
+    # Test that imported lines get the same values as the onchange gives,
+    # and compare the time spent by both ways
+    def test_import_lines(self):
+        self.env["product.supplierinfo"].create(
+            {
+                "product_tmpl_id": self.product_order.product_tmpl_id.id,
+                "partner_id": self.partner_a.id,
+                "price": 12.0,
+                "delay": 3,
+            }
+        )
+        purchase_return_orders = (
+            self.env["purchase.return.order"]
+            .with_context(tracking_disable=True)
+            .create([{"partner_id": self.partner_a.id} for _i in range(2)])
+        )
+        PurchaseReturnOrderLine = self.env["purchase.return.order.line"].with_context(
+            tracking_disable=True
+        )
+        vals_list = [
+            {
+                "order_id": purchase_return_order.id,
+                "product_id": product.id,
+                "product_qty": 2.0,
+                "display_type": "product",
+            }
+            for purchase_return_order in purchase_return_orders
+            for product in (self.product_order, self.service_order) * 50
+        ]
+        created_lines = PurchaseReturnOrderLine.create([dict(v) for v in vals_list])
+        imported_lines = PurchaseReturnOrderLine.import_lines(
+            [dict(v) for v in vals_list]
+        )
+        fields = [
+            "name",
+            "price_unit",
+            "product_qty",
+            "product_uom",
+            "taxes_id",
+            "date_planned",
+        ]
+        created_values = created_lines.read(fields, load=None)
+        imported_values = imported_lines.read(fields, load=None)
+        for created, imported in zip(created_values, imported_values):
+            created.pop("id")
+            imported.pop("id")
+            self.assertEqual(created, imported)
+        imported_product_lines = imported_lines.filtered(
+            lambda l: l.product_id == self.product_order
+        )
+        self.assertEqual(set(imported_product_lines.mapped("price_unit")), {12.0})
+
+    # Test that imported lines keep the given display type
+    def test_import_lines_display_type(self):
+        purchase_return_order = (
+            self.env["purchase.return.order"]
+            .with_context(tracking_disable=True)
+            .create({"partner_id": self.partner_a.id})
+        )
+        lines = (
+            self.env["purchase.return.order.line"]
+            .with_context(tracking_disable=True)
+            .import_lines(
+                [
+                    {
+                        "order_id": purchase_return_order.id,
+                        "name": "Section",
+                        "display_type": "line_section",
+                    },
+                    {
+                        "order_id": purchase_return_order.id,
+                        "product_id": self.product_order.id,
+                        "product_qty": 1.0,
+                    },
+                ]
+            )
+        )
+        self.assertEqual(lines.mapped("display_type"), ["line_section", "product"])
+
+    # Test the taxes of lines imported for vendors with different fiscal positions
+    def test_import_lines_fiscal_position(self):
+        tax = self.company_data["default_tax_purchase"]
+        tax_mapped = tax.copy({"name": "Mapped purchase tax"})
+        self.product_order.supplier_taxes_id = tax
+        self.partner_b.property_account_position_id = self.env[
+            "account.fiscal.position"
+        ].create(
+            {
+                "name": "Vendor fiscal position",
+                "tax_ids": [
+                    (0, 0, {"tax_src_id": tax.id, "tax_dest_id": tax_mapped.id})
+                ],
+            }
+        )
+        purchase_return_orders = (
+            self.env["purchase.return.order"]
+            .with_context(tracking_disable=True)
+            .create(
+                [
+                    {"partner_id": partner.id}
+                    for partner in (self.partner_a, self.partner_b)
+                ]
+            )
+        )
+        purchase_return_orders.fiscal_position_id = False
+        lines = (
+            self.env["purchase.return.order.line"]
+            .with_context(tracking_disable=True)
+            .import_lines(
+                [
+                    {
+                        "order_id": purchase_return_order.id,
+                        "product_id": self.product_order.id,
+                        "product_qty": 1.0,
+                        "display_type": "product",
+                    }
+                    for purchase_return_order in purchase_return_orders
+                ]
+            )
+        )
+        self.assertEqual(lines[0].taxes_id, tax)
+        self.assertEqual(lines[1].taxes_id, tax_mapped)
+
+    # Test the amounts of lines grouped by taxes, prices and quantities
+    def test_compute_amount_batch(self):
+        tax = self.company_data["default_tax_purchase"]
+        tax_included = tax.copy({"name": "Included tax", "price_include": True})
+        purchase_return_order = (
+            self.env["purchase.return.order"]
+            .with_context(tracking_disable=True)
+            .create({"partner_id": self.partner_a.id})
+        )
+        PurchaseReturnOrderLine = self.env["purchase.return.order.line"].with_context(
+            tracking_disable=True
+        )
+        lines = PurchaseReturnOrderLine.create(
+            [
+                {
+                    "name": product.name,
+                    "product_id": product.id,
+                    "product_qty": qty,
+                    "product_uom": product.uom_id.id,
+                    "price_unit": 10.0,
+                    "order_id": purchase_return_order.id,
+                    "taxes_id": [(6, 0, taxes.ids)],
+                    "display_type": "product",
+                }
+                for product, qty, taxes in [
+                    (self.product_order, 1.0, tax),
+                    (self.product_order, 1.0, tax),
+                    (self.service_order, 1.0, tax),
+                    (self.product_order, 2.0, tax),
+                    (self.product_order, 1.0, tax.browse()),
+                    (self.product_order, 1.0, tax_included),
+                    (self.service_order, 1.0, tax_included),
+                ]
+            ]
+        )
+        for line in lines:
+            expected = line.taxes_id.compute_all(
+                line.price_unit,
+                purchase_return_order.currency_id,
+                line.product_qty,
+                line.product_id,
+                purchase_return_order.partner_id,
+            )
+            self.assertAlmostEqual(line.price_subtotal, expected["total_excluded"])
+            self.assertAlmostEqual(line.price_total, expected["total_included"])
+        self.assertLess(lines[-1].price_subtotal, 10.0)
+        self.assertAlmostEqual(lines[-1].price_total, 10.0)
+        self.assertAlmostEqual(
+            purchase_return_order.amount_untaxed, sum(lines.mapped("price_subtotal"))
+        )
+        self.assertAlmostEqual(
+            purchase_return_order.amount_total, sum(lines.mapped("price_total"))
+        )
@@ -0,0 +1,67 @@
+# License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
+import logging
+import time
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "purchase_return_benchmark")
+class TestPurchaseReturnOrderLineBenchmark(TransactionCase):
+    """Time `import_lines` against creating the same lines one at a time,
+    the way the form does. Not run by default, use
+    ``--test-tags purchase_return_benchmark``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        partner = cls.env["res.partner"].create({"name": "Benchmark vendor"})
+        cls.orders = cls.env["purchase.return.order"].create(
+            [{"partner_id": partner.id} for __ in range(20)]
+        )
+        products = cls.env["product.product"].create(
+            [{"name": "Benchmark %s" % i, "type": "consu"} for i in range(25)]
+        )
+        cls.env["product.supplierinfo"].create(
+            [
+                {
+                    "product_tmpl_id": product.product_tmpl_id.id,
+                    "partner_id": partner.id,
+                    "price": 10.0,
+                }
+                for product in products
+            ]
+        )
+        cls.vals_list = [
+            {
+                "order_id": order.id,
+                "product_id": product.id,
+                "product_qty": 1.0,
+                "display_type": "product",
+            }
+            for order in cls.orders
+            for product in products
+        ]
+
+    def test_import_lines(self):
+        Line = self.env["purchase.return.order.line"]
+        start = time.perf_counter()
+        for vals in self.vals_list:
+            Line.create(dict(vals))
+        self.env.flush_all()
+        create_time = time.perf_counter() - start
+        start = time.perf_counter()
+        imported_lines = Line.import_lines([dict(vals) for vals in self.vals_list])
+        self.env.flush_all()
+        import_time = time.perf_counter() - start
+        _logger.info(
+            "%d return lines: %.3fs created one at a time, %.3fs imported",
+            len(self.vals_list),
+            create_time,
+            import_time,
+        )
+        self.assertEqual(len(imported_lines), len(self.vals_list))
+        self.assertEqual(set(imported_lines.mapped("price_unit")), {10.0})